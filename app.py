@@ -1,31 +1,28 @@
-import io
-from fastapi import FastAPI, UploadFile, File
-from parsers import REGISTRY, detect_bank_from_text
-from parsers.base import extract_full_text
-from parsers.common import normalize_transactions
+import os
+from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi.responses import ORJSONResponse
+from starlette.concurrency import run_in_threadpool
+from parsers import parse_document
 
-app = FastAPI()
+# Tamaño máximo aceptado (MB); configurable por entorno
+MAX_UPLOAD_MB = int(os.environ.get("MAX_UPLOAD_MB", "50"))
+
+# orjson serializa la lista de transacciones mucho más rápido que json.dumps
+app = FastAPI(default_response_class=ORJSONResponse)
 
 @app.post("/parse")
 async def parse_pdf(file: UploadFile = File(...)):
-    pdf_bytes = await file.read()
-    # Texto completo para detección del banco
-    full_text = extract_full_text(io.BytesIO(pdf_bytes))
-
-    # 1) Detectar banco
-    bank_key = detect_bank_from_text(full_text)
-
-    # 2) Seleccionar parser
-    parser_cls = REGISTRY.get(bank_key)
-    if not parser_cls:
-        parser_cls = REGISTRY["generic"]
-
-    parser = parser_cls()
-    raw_txs = parser.parse(pdf_bytes, full_text)
-
-    # 3) Normalizar (amount siempre positivo + direction)
-    txs = normalize_transactions(raw_txs)
-
-    return txs
-
-
+    if file.size is not None and file.size > MAX_UPLOAD_MB * (1 << 20):
+        raise HTTPException(status_code=413, detail=f"El PDF supera {MAX_UPLOAD_MB} MB")
+
+    # UploadFile ya viene en un SpooledTemporaryFile (a disco si es grande):
+    # se lo pasamos directo a pdfplumber en vez de copiarlo a bytes + BytesIO
+    pdf = file.file
+    pdf.seek(0)
+    if b"%PDF-" not in pdf.read(1024):
+        raise HTTPException(status_code=400, detail="El archivo no es un PDF")
+    pdf.seek(0)
+
+    # El parseo es CPU puro (y puede esperar al pool de extracción): va a un thread
+    # para no bloquear el event loop mientras dura
+    return await run_in_threadpool(parse_document, pdf)
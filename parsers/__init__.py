@@ -1,32 +1,42 @@
+import importlib
+import io
 import re
-from .base import GenericParser
-from .ifb import IFBParser
-from .valley import ValleyParser
-from .mercury import MercuryParser
-from .pnb import PNBParser
-from .wf import WFParser
-from .citi import CitiParser
-from .truist import TruistParser
-from .bofa import BOFAParser
-from .chase import ChaseParser
-# Si añadiste bofa_relationship.py, descomenta estas dos líneas:
-# from .bofa_relationship import BOFARelationshipParser
-
-# Registramos CLASES, no instancias
+from functools import lru_cache
+from typing import Any, BinaryIO, Dict, List, Union
+
+from .base import extract_full_text
+from .common import normalize_transactions
+
+# Registramos rutas "módulo:Clase" (no clases ni instancias): cada módulo de banco
+# se importa recién la primera vez que se lo pide (ver get_parser)
 REGISTRY = {
-    "generic": GenericParser,
-    "ifb": IFBParser,
-    "valley": ValleyParser,
-    "mercury": MercuryParser,
-    "pnb": PNBParser,
-    "wf": WFParser,
-    "citi": CitiParser,
-    "truist": TruistParser,
-    "bofa": BOFAParser,
-    # "bofa_relationship": BOFARelationshipParser,  # si lo agregaste
-    "chase": ChaseParser,
+    "generic": ".base:GenericParser",
+    "ifb": ".ifb:IFBParser",
+    "valley": ".valley:ValleyParser",
+    "mercury": ".mercury:MercuryParser",
+    "pnb": ".pnb:PNBParser",
+    "wf": ".wf:WFParser",
+    "citi": ".citi:CitiParser",
+    "truist": ".truist:TruistParser",
+    "bofa": ".bofa:BOFAParser",
+    # "bofa_relationship": ".bofa_relationship:BOFARelationshipParser",  # si lo agregaste
+    "chase": ".chase:ChaseParser",
 }
 
+def get_parser(key: str):
+    """Parser para `key` (o el genérico si no está registrado).
+
+    Se crea una sola instancia por banco y se reusa en cada request: los parsers
+    no guardan estado entre llamadas (parse solo usa locales), así que
+    compartirlos entre requests concurrentes es seguro.
+    """
+    return _load_parser(key if key in REGISTRY else "generic")
+
+@lru_cache(maxsize=None)
+def _load_parser(key: str):
+    module, cls = REGISTRY[key].split(":")
+    return getattr(importlib.import_module(module, __name__), cls)()
+
 # Patrones para detectar banco en el texto - ORDEN IMPORTANTE
 DETECTION = [
     # --- BOFA primero (para no confundir wires que mencionan JPMorgan Chase) ---
@@ -95,12 +105,55 @@ DETECTION = [
     ]),
 ]
 
+# Patrones que son texto literal (a lo sumo con "\." escapado): no necesitan regex
+RE_LITERAL_PATTERN = re.compile(r"(?:[^\\^$.*+?()\[\]{}|]|\\\.)+")
+
+def _compile_detection(pats):
+    """Separa los literales (se buscan con `in` sobre el texto en minúsculas) del resto,
+    que va en una sola alternación compilada con re.I."""
+    literals = tuple(p.replace(r"\.", ".").lower() for p in pats if RE_LITERAL_PATTERN.fullmatch(p))
+    regexes = [p for p in pats if not RE_LITERAL_PATTERN.fullmatch(p)]
+    combined = re.compile("|".join(f"(?:{p})" for p in regexes), re.I) if regexes else None
+    return literals, combined
+
+# Cuánto texto del principio del PDF se mira para detectar el banco
+DETECTION_WINDOW = 20000
+
+# Compilados una vez al importar (mismo orden que DETECTION)
+DETECTION_RE = [(key, *_compile_detection(pats)) for key, pats in DETECTION]
+
 def detect_bank_from_text(full_text: str) -> str:
     """Detecta el banco a partir del texto del PDF."""
     if not full_text:
         return "generic"
-    t = full_text[:20000]  # limitamos para performance
-    for key, pats in DETECTION:
-        if any(re.search(p, t, flags=re.I) for p in pats):
+    # Solo los primeros DETECTION_WINDOW caracteres: los regex buscan sobre el texto
+    # original con endpos; los literales, en el slice pasado a minúsculas
+    t_low = full_text[:DETECTION_WINDOW].lower()
+    for key, literals, combined in DETECTION_RE:
+        if any(lit in t_low for lit in literals) or (
+            combined is not None and combined.search(full_text, 0, DETECTION_WINDOW)
+        ):
             return key
     return "generic"
+
+def parse_document(pdf: Union[bytes, BinaryIO], parallel: bool = True) -> List[Dict[str, Any]]:
+    """Pipeline completo para un PDF: extraer texto, detectar banco, parsear y normalizar.
+
+    Es una función de módulo que recibe bytes y devuelve dicts, así que se puede
+    mandar a un ProcessPoolExecutor para procesar varios PDFs en paralelo. En ese
+    caso pasá parallel=False (ex.map(partial(parse_document, parallel=False), lista_de_bytes))
+    para que cada worker extraiga en serie en vez de levantar su propio pool.
+    """
+    if isinstance(pdf, (bytes, bytearray)):
+        pdf = io.BytesIO(pdf)
+
+    # Texto completo: se extrae una sola vez y lo reusan la detección y el parser
+    full_text = extract_full_text(pdf, parallel)
+
+    # 1) Detectar banco y 2) seleccionar parser
+    parser = get_parser(detect_bank_from_text(full_text))
+    pdf.seek(0)
+    raw_txs = parser.parse(pdf, full_text)
+
+    # 3) Normalizar (amount siempre positivo + direction)
+    return normalize_transactions(raw_txs)
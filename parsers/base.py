@@ -1,22 +1,60 @@
-import io, re
+import io, multiprocessing, os, re, shutil, tempfile, threading
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from itertools import product
+from typing import BinaryIO, List, Dict, Any, Optional, Callable, Iterator, Tuple
 import pdfplumber
 
-# Regex más específico para montos: debe tener $ o decimales o ser negativo para ser considerado monto
-RE_AMOUNT = re.compile(r"(?:\$\d{1,3}(?:,\d{3})*(?:\.\d{2})?|\(?-\d{1,3}(?:,\d{3})*(?:\.\d{2})?\)?|\d{1,3}(?:,\d{3})*\.\d{2})")
-RE_DATE_SLASH = re.compile(r"^\s*(\d{1,2})/(\d{1,2})(?:/(\d{2,4}))?\b")
-RE_DATE_LONG  = re.compile(r"\b([A-Za-z]{3,9})\s+(\d{1,2}),\s*(\d{4})\b", re.I)
-RE_DATE_MMMDD = re.compile(r"^\s*(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)\s+(\d{1,2})\b", re.I)
-
 MONTHS = {
     "january":1,"february":2,"march":3,"april":4,"may":5,"june":6,
     "july":7,"august":8,"september":9,"october":10,"november":11,"december":12,
     "jan":1,"feb":2,"mar":3,"apr":4,"may":5,"jun":6,"jul":7,"aug":8,"sep":9,"sept":9,"oct":10,"nov":11,"dec":12
 }
 
+# Número de mes por las 3 primeras letras, en cualquier combinación de mayúsculas
+# ("Sep", "SEP", "sep"...): todos los nombres de MONTHS se distinguen por su prefijo,
+# así que el lookup no necesita .lower() sobre lo que matcheó el regex
+_MONTH_BY_PREFIX = {
+    "".join(v): n
+    for k, n in MONTHS.items() if len(k) == 3
+    for v in product(*((c, c.upper()) for c in k))
+}
+
+# Solo nombres de mes reales (los más largos primero: "september" antes que "sept"/"sep")
+_MONTHS_ALT = "|".join(sorted(MONTHS, key=len, reverse=True))
+
+# Regex más específico para montos: debe tener $ o decimales o ser negativo para ser considerado monto
+RE_AMOUNT = re.compile(r"(?:\$\d{1,3}(?:,\d{3})*(?:\.\d{2})?|\(?-\d{1,3}(?:,\d{3})*(?:\.\d{2})?\)?|\d{1,3}(?:,\d{3})*\.\d{2})")
+# Monto al final de una descripción (clean_desc_remove_amount)
+RE_AMOUNT_TAIL = re.compile(r"\s*" + RE_AMOUNT.pattern + r"\s*$")
+RE_YEAR = re.compile(r"\b(20\d{2})\b")
+RE_DATE_SLASH = re.compile(r"^\s*(\d{1,2})/(\d{1,2})(?:/(\d{2,4}))?\b")
+RE_DATE_LONG  = re.compile(rf"\b({_MONTHS_ALT})\s+(\d{{1,2}}),\s*(\d{{4}})\b", re.I)
+RE_DATE_MMMDD = re.compile(r"^\s*(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)\s+(\d{1,2})\b", re.I)
+# Las tres formas anteriores como ramas con grupos con nombre (ver _date_from_any_match);
+# se combinan en un solo regex en el orden de prioridad que use cada banco
+PAT_DATE_SLASH = r"^\s*(?P<mm>\d{1,2})/(?P<dd>\d{1,2})(?:/(?P<yy>\d{2,4}))?\b"
+PAT_DATE_LONG = rf"^.*?\b(?P<lmon>{_MONTHS_ALT})\s+(?P<lday>\d{{1,2}}),\s*(?P<lyear>\d{{4}})\b"
+PAT_DATE_MMMDD = r"^\s*(?P<smon>Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)\s+(?P<sday>\d{1,2})\b"
+# Misma prioridad que parse_mmdd_token -> parse_long_date -> parse_mmmdd (ver parse_any_date)
+RE_DATE_ANY = re.compile("|".join((PAT_DATE_SLASH, PAT_DATE_LONG, PAT_DATE_MMMDD)), re.I)
+# Variante para escanear todo el texto de una vez: ^ por línea y \s sin cruzar saltos de línea.
+# El lookahead inicial descarta enseguida las líneas sin dígitos (ninguna fecha las tiene).
+RE_DATE_ANY_ML = re.compile(
+    r"^(?=[^\n]*\d)(?:" + RE_DATE_ANY.pattern.replace(r"\s", r"[^\S\n]") + ")", re.I | re.M
+)
+
+# Prefiltro: todas las formas de fecha llevan dígitos; una búsqueda de \d es mucho más
+# barata que probar los nombres de mes en cada posición de una línea sin números
+_HAS_DIGIT = re.compile(r"\d").search
+
+# NBSP -> espacio; guiones tipográficos (en/em dash, signo menos) -> "-"
+_NORM_TABLE = str.maketrans({"\u00A0": " ", "–": "-", "—": "-", "−": "-"})
+
 def norm(s: str) -> str:
-    return (s or "").replace("\u00A0", " ").replace("–", "-").replace("—", "-").replace("−", "-").strip()
+    return s.translate(_NORM_TABLE).strip() if s else ""
 
 def ensure_utf8(x):
     """Compatibilidad: convierte bytes o str en str utf-8 seguro"""
@@ -24,36 +62,125 @@ def ensure_utf8(x):
         return x.decode("utf-8", errors="ignore")
     return str(x)
 
-def extract_full_text(file_like: io.BytesIO) -> str:
-    """Extrae texto de todas las páginas del PDF en un solo string."""
+# Extracción en paralelo: por debajo de PARALLEL_MIN_PAGES repartir tareas entre
+# procesos no compensa; cada tarea procesa PAGES_PER_TASK páginas consecutivas.
+PARALLEL_MIN_PAGES = 10
+PAGES_PER_TASK = 5
+
+def _available_cpus() -> int:
+    # sched_getaffinity respeta los CPUs asignados al contenedor/proceso; cpu_count() ve todo el host
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+# Procesos del pool de extracción; configurable por entorno (p. ej. la cuota de CPU del contenedor)
+EXTRACT_WORKERS = int(os.environ.get("EXTRACT_WORKERS", "0")) or _available_cpus()
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Pool de extracción único por proceso, creado la primera vez que se necesita.
+
+    Usa forkserver (spawn donde no existe) en vez de fork: los workers no heredan
+    una copia del servidor (event loop, threads) ni se crean de nuevo en cada request.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(
+                max_workers=EXTRACT_WORKERS, mp_context=multiprocessing.get_context(method)
+            )
+        return _pool
+
+def _reset_pool() -> None:
+    """Descarta el pool (p. ej. si se rompió porque murió un worker); el próximo uso crea otro."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def _page_text(p) -> str:
+    return p.extract_text(x_tolerance=2, y_tolerance=3) or ""
+
+def _extract_page_range(path: str, start: int) -> List[str]:
+    with pdfplumber.open(path) as pdf:
+        return [_page_text(p) for p in pdf.pages[start:start + PAGES_PER_TASK]]
+
+def extract_full_text(file_like: BinaryIO, parallel: bool = True) -> str:
+    """Extrae texto de todas las páginas del PDF en un solo string.
+
+    Statements largos se reparten por rangos de páginas en el pool compartido
+    (pdfplumber es Python puro, los threads no escalan por el GIL). Con
+    parallel=False se extrae en serie: lo usan quienes ya reparten PDFs en su
+    propio pool (otro pool por worker multiplicaría los procesos).
+    """
     with pdfplumber.open(file_like) as pdf:
-        return "\n".join(
-            p.extract_text(x_tolerance=2, y_tolerance=3) or "" 
-            for p in pdf.pages
-        )
+        n_pages = len(pdf.pages)
+        if not parallel or n_pages < PARALLEL_MIN_PAGES or EXTRACT_WORKERS < 2:
+            return "\n".join(_page_text(p) for p in pdf.pages)
 
-def extract_lines(pdf_bytes: bytes) -> List[str]:
-    lines = []
-    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
-        for p in pdf.pages:
-            txt = p.extract_text(x_tolerance=2, y_tolerance=3) or ""
-            for ln in txt.split("\n"):
-                n = norm(ln)
-                if n:
-                    lines.append(n)
+    # Los workers abren el PDF desde un archivo temporal: los bytes no viajan por IPC en cada tarea
+    file_like.seek(0)
+    tmp = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
+    try:
+        with tmp:
+            shutil.copyfileobj(file_like, tmp)
+        starts = range(0, n_pages, PAGES_PER_TASK)
+        chunks = _get_pool().map(_extract_page_range, [tmp.name] * len(starts), starts)
+        return "\n".join(t for chunk in chunks for t in chunk)
+    except BrokenProcessPool:
+        _reset_pool()
+    finally:
+        os.unlink(tmp.name)
+
+    # Murió un worker: el próximo request tendrá un pool nuevo; este se extrae en serie
+    file_like.seek(0)
+    with pdfplumber.open(file_like) as pdf:
+        return "\n".join(_page_text(p) for p in pdf.pages)
+
+def fix_mojibake(s: str) -> str:
+    """Repara UTF-8 leído como latin-1 ("electrÃ³nicos" -> "electrónicos").
+
+    Si el resultado no decodifica limpio (p. ej. un "Ã" legítimo), devuelve s sin cambios.
+    """
+    try:
+        return s.encode("latin-1").decode("utf-8")
+    except UnicodeError:
+        return s
+
+def split_lines(full_text: str) -> List[str]:
+    """Líneas normalizadas y no vacías a partir del texto ya extraído con extract_full_text.
+
+    El mojibake se repara acá, una sola vez, así los parsers solo necesitan la forma correcta.
+    """
+    full_text = full_text or ""
+    lines = [n for ln in full_text.split("\n") if (n := norm(ln))]
+    if "Ã" in full_text or "Â" in full_text:
+        lines = [fix_mojibake(ln) if "Ã" in ln or "Â" in ln else ln for ln in lines]
     return lines
 
-def extract_tables(pdf_bytes: bytes):
-    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
-        for p in pdf.pages:
-            for tbl in (p.extract_tables() or []):
-                yield tbl
+def extract_lines(pdf_bytes: bytes) -> List[str]:
+    """Abre el PDF y extrae sus líneas. Si ya tenés full_text, usá split_lines para no re-extraer."""
+    return split_lines(extract_full_text(io.BytesIO(pdf_bytes)))
+
+def extract_tables(pdf: BinaryIO, table_settings: Optional[Dict[str, Any]] = None):
+    """Genera las tablas página por página; cada grilla se materializa recién al consumirla."""
+    with pdfplumber.open(pdf) as doc:
+        for p in doc.pages:
+            for tbl in p.find_tables(table_settings or {}):
+                yield tbl.extract()
 
 def detect_year(text: str) -> int:
-    m = re.search(r"\b(20\d{2})\b", text or "")
+    m = RE_YEAR.search(text) if text else None
     return int(m.group(1)) if m else datetime.utcnow().year
 
 def parse_mmdd_token(s: str, fallback_year: int) -> Optional[str]:
+    # Las líneas ya vienen con strip(): si no empiezan con dígito (o espacio) no hay fecha
+    c = s[:1]
+    if not (c.isdigit() or c.isspace()): return None
     m = RE_DATE_SLASH.match(s)
     if not m: return None
     mm, dd, yy = int(m.group(1)), int(m.group(2)), m.group(3)
@@ -62,35 +189,133 @@ def parse_mmdd_token(s: str, fallback_year: int) -> Optional[str]:
     return f"{y:04d}-{mm:02d}-{dd:02d}"
 
 def parse_long_date(s: str) -> Optional[str]:
+    if not _HAS_DIGIT(s): return None
     m = RE_DATE_LONG.search(s)
     if not m: return None
-    mon = MONTHS.get(m.group(1).lower())
+    mon = _MONTH_BY_PREFIX.get(m.group(1)[:3])
     return f"{int(m.group(3)):04d}-{mon:02d}-{int(m.group(2)):02d}" if mon else None
 
 def parse_mmmdd(s: str, fallback_year: int) -> Optional[str]:
+    c = s[:1]
+    if not (c.isalpha() or c.isspace()): return None
     m = RE_DATE_MMMDD.match(s)
     if not m: return None
-    mon = MONTHS.get(m.group(1).lower())
+    mon = _MONTH_BY_PREFIX.get(m.group(1)[:3])
     return f"{fallback_year:04d}-{mon:02d}-{int(m.group(2)):02d}" if mon else None
 
+def parse_any_date(s: str, fallback_year: int, rx: re.Pattern = RE_DATE_ANY) -> Optional[str]:
+    """Igual que parse_mmdd_token(s) or parse_long_date(s) or parse_mmmdd(s), con un solo match.
+
+    `rx` permite otro orden de prioridad: cualquier alternación de PAT_DATE_* sirve.
+    """
+    if not _HAS_DIGIT(s): return None
+    m = rx.match(s)
+    return _date_from_any_match(m, fallback_year) if m else None
+
+def _date_from_any_match(m: re.Match, fallback_year: int) -> Optional[str]:
+    # re.I deja matchear prefijos que no son claves (p. ej. "ſep" por case folding): None
+    if m.group("mm"):
+        mm, dd, yy = int(m.group("mm")), int(m.group("dd")), m.group("yy")
+        y = int(yy) if yy else fallback_year
+        if y < 100: y = 2000 + y
+        return f"{y:04d}-{mm:02d}-{dd:02d}"
+    if m.group("lmon"):
+        mon = _MONTH_BY_PREFIX.get(m.group("lmon")[:3])
+        return f"{int(m.group('lyear')):04d}-{mon:02d}-{int(m.group('lday')):02d}" if mon else None
+    mon = _MONTH_BY_PREFIX.get(m.group("smon")[:3])
+    return f"{fallback_year:04d}-{mon:02d}-{int(m.group('sday')):02d}" if mon else None
+
+_AMOUNT_STRIP = str.maketrans("", "", "()-$,")
+
+def parse_amount(tok: str) -> Optional[float]:
+    """Token de RE_AMOUNT ("$1,234.56", "(12.00)", "63.43-") -> float con signo, o None.
+
+    Los montos tienen 0 o 2 decimales: se calculan en centavos enteros y se divide
+    una sola vez (int/int redondea igual que float(), sin el parser decimal general).
+    """
+    neg = tok.endswith("-") or tok.startswith("-") or tok.startswith("(")
+    digits = tok.translate(_AMOUNT_STRIP)
+    whole, dot, frac = digits.partition(".")
+    if digits.isascii() and whole.isdigit() and (not dot or (len(frac) == 2 and frac.isdigit())):
+        val = (int(whole) * 100 + (int(frac) if dot else 0)) / 100
+    else:
+        try:
+            val = float(digits)
+        except ValueError:
+            return None
+    return -val if neg else val
+
 def pick_amount(tokens: List[str], prefer_first=True) -> Optional[float]:
     if not tokens: return None
     tok = tokens[0] if prefer_first else (next((t for t in tokens if "-" in t or "(" in t), tokens[0]))
-    neg = tok.endswith("-") or tok.startswith("-") or tok.startswith("(")
-    tok = tok.replace("(", "").replace(")", "").replace("-", "").replace("$", "").replace(",", "")
-    try:
-        val = float(tok)
-        return -val if neg else val
-    except:
-        return None
+    return parse_amount(tok)
+
+def first_amount(text: str) -> Optional[float]:
+    """Equivale a pick_amount(RE_AMOUNT.findall(text)), pero deja de escanear en el primer monto."""
+    m = RE_AMOUNT.search(text)
+    return pick_amount([m.group()]) if m else None
 
 def clean_desc_remove_amount(desc: str) -> str:
-    return re.sub(r"\s*"+RE_AMOUNT.pattern+r"\s*$", "", desc).strip()
+    """Quita el monto final de la descripción (lo que matchea RE_AMOUNT_TAIL).
+
+    Un monto no tiene espacios, así que solo puede estar en la última palabra:
+    el regex arranca desde ahí en vez de probar cada posición de la descripción.
+    """
+    head = desc.rstrip().rsplit(None, 1)
+    m = RE_AMOUNT_TAIL.search(desc, len(head[0]) if len(head) == 2 else 0)
+    return (desc[:m.start()] if m else desc).strip()
+
+# Líneas que son solo un monto ("$1,234.56") o solo un número de cuenta
+RE_STANDALONE_AMOUNT = re.compile(r"^\s*\$[\d,]+\.\d{2}\s*$")
+RE_ACCOUNT_NUMBER = re.compile(r"^\s*\d{12,}\s*$")
+
+def is_amount_or_account_line(line: str) -> bool:
+    """Línea (ya normalizada) con solo un monto suelto o un número de cuenta.
+
+    Miramos el primer carácter antes de correr el regex: casi ninguna línea
+    empieza con "$" o un dígito, así que la mayoría se descarta sin regex.
+    """
+    c = line[:1]
+    if c == "$":
+        return RE_STANDALONE_AMOUNT.match(line) is not None
+    return c.isdigit() and RE_ACCOUNT_NUMBER.match(line) is not None
+
+def date_blocks(lines: List[str], parse_date: Callable[[str], Optional[str]]) -> Iterator[Tuple[str, List[str]]]:
+    """Agrupa las líneas en (fecha, bloque): cada bloque va de una línea con fecha hasta la siguiente.
+
+    Cada línea se parsea una sola vez; lo anterior a la primera fecha se descarta.
+    """
+    dates = [parse_date(ln) for ln in lines]
+    starts = [i for i, d in enumerate(dates) if d]
+    ends = starts[1:] + [len(lines)]
+    for i, j in zip(starts, ends):
+        yield dates[i], lines[i:j]
+
+def any_date_blocks(lines: List[str], fallback_year: int) -> Iterator[Tuple[str, List[str]]]:
+    """Igual que date_blocks(lines, lambda ln: parse_any_date(ln, fallback_year)),
+    pero con un solo finditer sobre todo el texto en vez de un match por línea.
+    """
+    text = "\n".join(lines)
+    offsets = [0]
+    for ln in lines:
+        offsets.append(offsets[-1] + len(ln) + 1)
+    starts: List[int] = []
+    dates: List[str] = []
+    for m in RE_DATE_ANY_ML.finditer(text):
+        d = _date_from_any_match(m, fallback_year)
+        if d:  # mes inválido: la línea no abre bloque, igual que en date_blocks
+            starts.append(bisect_right(offsets, m.start()) - 1)
+            dates.append(d)
+    ends = starts[1:] + [len(lines)]
+    for d, i, j in zip(dates, starts, ends):
+        yield d, lines[i:j]
 
 class BaseBankParser:
     key = "generic"
+    __slots__ = ()
 
-    def parse(self, pdf_bytes: bytes, full_text: str) -> List[Dict[str, Any]]:
+    def parse(self, pdf: BinaryIO, full_text: str) -> List[Dict[str, Any]]:
+        """pdf: archivo original (posicionado en 0); full_text: texto ya extraído con extract_full_text."""
         raise NotImplementedError
 
     def infer_year(self, full_text: str) -> int:
@@ -99,24 +324,15 @@ class BaseBankParser:
 
 class GenericParser(BaseBankParser):
     key = "generic"
-    def parse(self, pdf_bytes: bytes, full_text: str) -> List[Dict[str, Any]]:
-        lines = extract_lines(pdf_bytes)
+    __slots__ = ()
+    def parse(self, pdf: BinaryIO, full_text: str) -> List[Dict[str, Any]]:
+        lines = split_lines(full_text)
         y = detect_year(full_text)
         txs: List[Dict[str, Any]] = []
-        i, n = 0, len(lines)
-        while i < n:
-            line = lines[i]
-            date = parse_mmdd_token(line, y) or parse_long_date(line) or parse_mmmdd(line, y)
-            if not date:
-                i += 1; continue
-            block = [line]; j = i+1
-            while j < n and not (parse_mmdd_token(lines[j], y) or parse_long_date(lines[j]) or parse_mmmdd(lines[j], y)):
-                block.append(lines[j]); j += 1
+        for date, block in any_date_blocks(lines, y):
             text = " ".join(block)
-            amts = RE_AMOUNT.findall(text)
-            amt = pick_amount(amts, prefer_first=True)
+            amt = first_amount(text)
             if amt is not None:
                 desc = clean_desc_remove_amount(text)
                 txs.append({"date": date, "description": desc, "amount": amt})
-            i = j
         return txs
@@ -1,18 +1,85 @@
 import re
-from typing import List, Dict, Any
+from typing import BinaryIO, List, Dict, Any
 from .base import (
     BaseBankParser,
-    extract_lines,
+    split_lines,
     detect_year,
     RE_AMOUNT,
+    parse_amount,
 )
 
+# Fecha MM/DD/YY (+ espacios) donde se corta una línea con varias transacciones pegadas
+RE_SPLIT_DATE = re.compile(r'(\d{1,2}/\d{1,2}/\d{2}\s+)')
+
+# Wires con tipo explícito ("WIRE TYPE:WIRE IN", "WIRE TYPE: INTL OUT", ...), sobre texto en minúsculas
+RE_WIRE_IN = re.compile(r"wire type:\s*(?:wire|intl|book|fx) in")
+RE_WIRE_OUT = re.compile(r"wire type:\s*(?:wire|intl|fx|book) out")
+
+# Reglas de dirección por palabra clave para _determine_direction: el orden es la
+# prioridad y gana la primera fila con alguna de sus palabras en la descripción
+DIRECTION_BY_KEYWORD = (
+    (("fee", "charge", "svc charge"), "out"),
+    (("checkcard", "purchase"), "out"),
+    (("deposit", "credit", "received", "cashreward"), "in"),
+)
+
+# _looks_like_balance_entry: fechas MM/DD sin año y palabras que delatan una transacción real
+RE_SHORT_DATE = re.compile(r'\b\d{1,2}/\d{1,2}\b(?!/\d{2})')
+KW_TX_INDICATORS = (
+    'wire type:', 'online banking', 'zelle', 'transfer', 'payment',
+    'checkcard', 'purchase', 'fee', 'deposit', 'withdrawal', 'ca tlr', 'bkofamerica',
+)
+
+# Fecha de transacción al inicio de la línea (MM/DD/YY)
+RE_TX_DATE = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{2})\b")
+
+# _clean_description: fecha inicial y montos se quitan en una sola pasada (la rama de
+# la fecha va primero y solo puede matchear en la posición 0); después la cola
+# "continued on the next page", que recién queda al final una vez quitados los montos
+RE_DESC_DROP = re.compile(r"^\s*\d{1,2}/\d{1,2}/\d{2}\s+|" + RE_AMOUNT.pattern)
+RE_CONTINUED_TAIL = re.compile(r"\s*continued\s+on\s+the\s+next\s+page\s*$", re.I)
+RE_WS = re.compile(r"\s+")
+
+# Líneas que son ruido si son exactamente una de estas frases o empiezan con ella + " "
+NOISE_LINES = (
+    "bank of america",
+    "your checking account",
+    "account summary",
+    "deposits and other credits",
+    "withdrawals and other debits",
+    "service fees",
+    "daily ledger balances",
+    "preferred rewards",
+    "important information",
+    "customer service",
+    "date description amount",
+    "total deposits",
+    "total withdrawals",
+    "total service fees",
+    "beginning balance",
+    "ending balance",
+    "average ledger",
+    "business advantage",
+    "this page intentionally",
+)
+# startswith() acepta una tupla: un solo llamado en vez de un loop concatenando " "
+NOISE_LINE_PREFIXES = tuple(p + " " for p in NOISE_LINES)
+
+# Patrones de ruido de _is_noise_line (se aplican sobre la línea en minúsculas)
+RE_PAGE_LINE = re.compile(r"^\s*page\s+\d+\s+of\s+\d+\s*$")
+RE_COLUMN_HEADER = re.compile(r"^\s*date\s+description\s+amount\s*$")
+RE_BALANCE_ROW = re.compile(r"^\s*\d{1,2}/\d{1,2}\s+[\d,]+\.\d{2}(?:\s*$|\s+\d{1,2}/\d{1,2})")
+
+# Encabezado de la tabla de saldos diarios ("Date Balance ($)"), sobre la línea en minúsculas
+RE_DAILY_HEADER = re.compile(r"^\s*date\s+balance\s*\(\s*\$\s*\)")
+
 class BOFAParser(BaseBankParser):
     key = "bofa"
     version = "2024.12.30.v-fix-missing-txs"
+    __slots__ = ()
     
-    def parse(self, pdf_bytes: bytes, full_text: str) -> List[Dict[str, Any]]:
-        raw_lines = extract_lines(pdf_bytes)
+    def parse(self, pdf: BinaryIO, full_text: str) -> List[Dict[str, Any]]:
+        raw_lines = split_lines(full_text)
         lines = self._split_concatenated_lines(raw_lines)
         
         year = detect_year(full_text)
@@ -25,43 +92,43 @@ class BOFAParser(BaseBankParser):
             if not line.strip():
                 continue
             
-            if self._is_daily_balance_section(line):
+            # La línea se pasa a minúsculas una sola vez y se reusa en todos los chequeos
+            line_lower = line.lower()
+
+            # Una sola clasificación por línea: inicio de saldos diarios o encabezado de sección
+            kind = self._line_kind(line_lower)
+            if kind == "daily":
                 in_daily_balances = True
                 continue
             
             if in_daily_balances:
-                if self._detect_section(line):
+                if kind:
                     in_daily_balances = False
-                    current_section = self._detect_section(line)
+                    current_section = kind
                 continue
             
-            section_detected = self._detect_section(line)
-            if section_detected:
-                current_section = section_detected
+            if kind:
+                current_section = kind
                 continue
             
-            if self._is_noise_line(line):
+            if self._is_noise_line(line_lower):
                 continue
 
-            if "wire transfer fee" in line.lower():
+            if "wire transfer fee" in line_lower:
                 date = self._extract_date(line, year)
                 if not date:
                     continue
 
                 amounts = RE_AMOUNT.findall(line)
                 for amt in amounts:
-                    clean_amt = amt.replace("$", "").replace(",", "").replace("(", "").replace(")", "").replace("-", "")
-                    try:
-                        val = float(clean_amt)
-                        if val > 0.01:
-                            results.append({
-                                "date": date,
-                                "description": "Wire Transfer Fee",
-                                "amount": val,
-                                "direction": "out"
-                            })
-                    except:
-                        continue
+                    val = parse_amount(amt)
+                    if val is not None and abs(val) > 0.01:
+                        results.append({
+                            "date": date,
+                            "description": "Wire Transfer Fee",
+                            "amount": abs(val),
+                            "direction": "out"
+                        })
                 continue
             
             date = self._extract_date(line, year)
@@ -76,10 +143,11 @@ class BOFAParser(BaseBankParser):
             if not description or len(description) < 5:
                 continue
             
-            if self._contains_header_phrases(description) or self._looks_like_balance_entry(description):
+            desc_lower = description.lower()
+            if self._contains_header_phrases(desc_lower) or self._looks_like_balance_entry(description, desc_lower):
                 continue
             
-            direction = self._determine_direction(description, current_section)
+            direction = self._determine_direction(desc_lower, current_section)
             if not direction:
                 continue
             
@@ -92,16 +160,13 @@ class BOFAParser(BaseBankParser):
         
         return results
     
-    def _looks_like_balance_entry(self, text: str) -> bool:
-        text_lower = text.lower()
-        dates_without_year = re.findall(r'\b\d{1,2}/\d{1,2}\b(?!/\d{2})', text)
+    def _looks_like_balance_entry(self, text: str, text_lower: str) -> bool:
+        # Un solo findall: si encontró alguna fecha, el search que venía después también
+        dates_without_year = RE_SHORT_DATE.findall(text)
         if len(dates_without_year) >= 2:
             return True
-        if re.search(r'\b\d{1,2}/\d{1,2}\b(?!/\d{2})', text):
-            has_transaction_indicators = any(indicator in text_lower for indicator in [
-                'wire type:', 'online banking', 'zelle', 'transfer', 'payment',
-                'checkcard', 'purchase', 'fee', 'deposit', 'withdrawal', 'ca tlr', 'bkofamerica'
-            ])
+        if dates_without_year:
+            has_transaction_indicators = any(indicator in text_lower for indicator in KW_TX_INDICATORS)
             if not has_transaction_indicators:
                 return True
         return False
@@ -110,10 +175,11 @@ class BOFAParser(BaseBankParser):
         processed = []
         for line in lines:
             if len(line) > 200:
-                parts = re.split(r'(\d{1,2}/\d{1,2}/\d{2}\s+)', line)
+                # split con grupo de captura: los índices impares son siempre las fechas separadoras
+                parts = RE_SPLIT_DATE.split(line)
                 temp_line = ""
-                for part in parts:
-                    if re.match(r'^\d{1,2}/\d{1,2}/\d{2}\s+$', part):
+                for k, part in enumerate(parts):
+                    if k % 2:
                         if temp_line.strip():
                             processed.append(temp_line.strip())
                         temp_line = part
@@ -125,8 +191,7 @@ class BOFAParser(BaseBankParser):
                 processed.append(line)
         return processed
     
-    def _contains_header_phrases(self, text: str) -> bool:
-        text_lower = text.lower()
+    def _contains_header_phrases(self, text_lower: str) -> bool:
         bad_phrases = [
             "this page intentionally left blank",
             "your checking account",
@@ -144,16 +209,16 @@ class BOFAParser(BaseBankParser):
             return True
         return False
     
-    def _is_daily_balance_section(self, line: str) -> bool:
-        line_lower = line.lower().strip()
-        if "daily ledger balances" in line_lower:
-            return True
-        if re.match(r"^\s*date\s+balance\s*\(\s*\$\s*\)", line_lower):
-            return True
-        return False
-    
-    def _detect_section(self, line: str) -> str | None:
-        line_lower = line.lower().strip()
+    def _line_kind(self, line_lower: str) -> str | None:
+        """"daily" si la línea abre la tabla de saldos diarios; "deposits"/"withdrawals"
+        si es el encabezado de una sección; None en otro caso. Recibe la línea ya en minúsculas.
+
+        Los substrings se prueban sobre ese único .lower(): un regex re.I con todas las
+        frases resultó varias veces más lento que estos `in`.
+        """
+        line_lower = line_lower.strip()
+        if "daily ledger balances" in line_lower or RE_DAILY_HEADER.match(line_lower):
+            return "daily"
         if "deposits and other additions" in line_lower or "deposits and other credits" in line_lower:
             return "deposits"
         elif "withdrawals and other debits" in line_lower or "other subtractions" in line_lower:
@@ -164,95 +229,71 @@ class BOFAParser(BaseBankParser):
             return "withdrawals"
         return None
     
-    def _is_noise_line(self, line: str) -> bool:
-        line_lower = line.lower()
-        
-        exact_noise = [
-            "bank of america",
-            "your checking account", 
-            "account summary",
-            "deposits and other credits",
-            "withdrawals and other debits",
-            "service fees",
-            "daily ledger balances",
-            "preferred rewards",
-            "important information",
-            "customer service",
-            "date description amount",
-            "total deposits",
-            "total withdrawals", 
-            "total service fees",
-            "beginning balance",
-            "ending balance",
-            "average ledger",
-            "business advantage",
-            "this page intentionally"
-        ]
-        
+    def _is_noise_line(self, line_lower: str) -> bool:
+        """Recibe la línea ya en minúsculas (los patrones de fechas/montos no tienen letras)."""
         line_stripped = line_lower.strip()
-        for pattern in exact_noise:
-            if line_stripped == pattern or line_stripped.startswith(pattern + " "):
-                return True
-        
-        if re.match(r"^\s*page\s+\d+\s+of\s+\d+\s*$", line_lower):
+        if line_stripped in NOISE_LINES or line_stripped.startswith(NOISE_LINE_PREFIXES):
             return True
         
-        if "continued on" in line_lower and "next page" in line_lower:
+        if RE_PAGE_LINE.match(line_lower):
             return True
         
-        if re.match(r"^\s*date\s+description\s+amount\s*$", line_lower):
+        if "continued on" in line_lower and "next page" in line_lower:
             return True
         
-        if re.match(r"^\s*\d{1,2}/\d{1,2}\s+[\d,]+\.\d{2}\s*$", line):
+        if RE_COLUMN_HEADER.match(line_lower):
             return True
         
-        if re.match(r"^\s*\d{1,2}/\d{1,2}\s+[\d,]+\.\d{2}\s+\d{1,2}/\d{1,2}", line):
+        # Filas de la tabla de saldos diarios ("01/02 1,000.00" o varias pegadas)
+        if RE_BALANCE_ROW.match(line_lower):
             return True
         
         return False
     
     def _extract_date(self, line: str, year: int) -> str | None:
-        match = re.match(r"(\d{1,2})/(\d{1,2})/(\d{2})\b", line.strip())
-        if match:
+        s = line.strip()
+        # Sin dígito al inicio no hay fecha: la mayoría de las líneas se descartan acá
+        if not s[:1].isdecimal():
+            return None
+        # Caso típico "MM/DD/YY ...": se lee por posición, sin pasar por el regex
+        if (
+            len(s) >= 8 and s[2] == "/" and s[5] == "/"
+            and s[:2].isdecimal() and s[3:5].isdecimal() and s[6:8].isdecimal()
+            and not (s[8:9].isalnum() or s[8:9] == "_")
+        ):
+            mm, dd, yy = s[:2], s[3:5], s[6:8]
+        elif match := RE_TX_DATE.match(s):
             mm, dd, yy = match.groups()
-            full_year = int(yy) + 2000 if int(yy) < 50 else int(yy) + 1900
-            return f"{full_year:04d}-{int(mm):02d}-{int(dd):02d}"
-        return None
+        else:
+            return None
+        full_year = int(yy) + 2000 if int(yy) < 50 else int(yy) + 1900
+        return f"{full_year:04d}-{int(mm):02d}-{int(dd):02d}"
     
     def _extract_amount(self, line: str) -> float | None:
         amounts = RE_AMOUNT.findall(line)
         if not amounts:
             return None
-        amount_str = amounts[-1]
-        clean = amount_str.replace("$", "").replace(",", "").replace("(", "").replace(")", "").replace("-", "")
-        try:
-            amount = float(clean)
-            if amount < 0.01 or amount > 10000000:
-                return None
-            return amount
-        except:
+        # Último monto de la línea (columna Amount); el signo lo da la sección, no el token
+        amount = parse_amount(amounts[-1])
+        if amount is None:
             return None
+        amount = abs(amount)
+        if amount < 0.01 or amount > 10000000:
+            return None
+        return amount
     
     def _clean_description(self, line: str) -> str:
-        cleaned = re.sub(r"^\s*\d{1,2}/\d{1,2}/\d{2}\s+", "", line)
-        cleaned = re.sub(RE_AMOUNT.pattern, "", cleaned)
-        cleaned = re.sub(r"\s*continued\s+on\s+the\s+next\s+page\s*$", "", cleaned, flags=re.I)
-        cleaned = re.sub(r"\s+", " ", cleaned)
+        cleaned = RE_DESC_DROP.sub("", line)
+        cleaned = RE_CONTINUED_TAIL.sub("", cleaned)
+        cleaned = RE_WS.sub(" ", cleaned)
         return cleaned.strip()
     
-    def _determine_direction(self, description: str, section_context: str = None) -> str | None:
-        desc_lower = description.lower()
-        
-        if (re.search(r"wire type:\s*wire in", desc_lower) or 
-            re.search(r"wire type:\s*intl in", desc_lower) or
-            re.search(r"wire type:\s*book in", desc_lower) or
-            re.search(r"wire type:\s*fx in", desc_lower)):
+    def _determine_direction(self, desc_lower: str, section_context: str = None) -> str | None:
+        """Dirección a partir de la descripción ya en minúsculas y la sección actual."""
+        if RE_WIRE_IN.search(desc_lower):
             return "in"
         
-        if (re.search(r"wire type:\s*wire out", desc_lower) or 
-            re.search(r"wire type:\s*intl out", desc_lower) or
-            re.search(r"wire type:\s*fx out", desc_lower) or
-            re.search(r"wire type:\s*book out", desc_lower)):
+        if RE_WIRE_OUT.search(desc_lower):
             return "out"
         
         if "zelle payment from" in desc_lower:
@@ -263,30 +304,16 @@ class BOFAParser(BaseBankParser):
         if "transfer" in desc_lower and "from" in desc_lower and "via wise" in desc_lower:
             return "in"
         
-        if any(keyword in desc_lower for keyword in ["fee", "charge", "svc charge"]):
-            return "out"
-        
-        if any(keyword in desc_lower for keyword in ["checkcard", "purchase"]):
-            return "out"
-        
-        if any(keyword in desc_lower for keyword in ["deposit", "credit", "received", "cashreward"]):
-            return "in"
+        for keywords, direction in DIRECTION_BY_KEYWORD:
+            if any(keyword in desc_lower for keyword in keywords):
+                return direction
         
         if ("preferred rewards" in desc_lower or "prfd rwds" in desc_lower) and "waiver" in desc_lower:
             return "out"
         
-        if "online banking transfer" in desc_lower or "online transfer" in desc_lower:
-            if section_context:
-                return "in" if section_context == "deposits" else "out"
-        
-        if "ca tlr transfer" in desc_lower:
-            if section_context:
-                return "in" if section_context == "deposits" else "out"
-        
-        if "bkofamerica bc" in desc_lower:
-            if section_context:
-                return "in" if section_context == "deposits" else "out"
-        
+        # La sección manda para el resto (transferencias online, CA TLR, BKOFAMERICA BC, ...).
+        # _line_kind solo devuelve "deposits" o "withdrawals", así que no hace falta
+        # distinguir esos casos antes: todos terminaban en esta misma regla.
         if section_context == "deposits":
             return "in"
         elif section_context == "withdrawals":
@@ -295,11 +322,11 @@ class BOFAParser(BaseBankParser):
         if "transfer" in desc_lower and "confirmation#" in desc_lower:
             return "out"
         
-        if "online banking" in desc_lower and any(kw in desc_lower for kw in ["payment", "transfer"]):
+        if "online banking" in desc_lower and ("payment" in desc_lower or "transfer" in desc_lower):
             return "out"
         
         if "wise inc" in desc_lower:
-            return "out" if "-" in description else "in"
+            return "out" if "-" in desc_lower else "in"
         
         if "ontop holdings" in desc_lower:
             return "in"
@@ -1,17 +1,21 @@
 import re
-from typing import List, Dict, Any, Optional
+from typing import BinaryIO, List, Dict, Any, Optional
 
 from .base import (
     BaseBankParser,
-    extract_lines,
+    split_lines,
     detect_year,
     RE_AMOUNT,
-    parse_mmdd_token,
-    parse_long_date,
-    parse_mmmdd,
+    parse_amount,
 )
 
-DATE_LINE = re.compile(r"^\s*\d{1,2}/\d{1,2}/\d{2}\b")
+# MM/DD/YY al inicio; los grupos alcanzan para armar la fecha sin volver a parsear
+DATE_LINE = re.compile(r"^\s*(\d{1,2})/(\d{1,2})/(\d{2})\b")
+# Línea con transacciones pegadas: se corta antes de cada MM/DD/YY
+RE_INNER_DATE = re.compile(r"\d{1,2}/\d{1,2}/\d{2}\s+\S")
+RE_SPLIT_BEFORE_DATE = re.compile(r"(?=(\d{1,2}/\d{1,2}/\d{2}\s))")
+# Período del encabezado: "for October 1, 2024 to October 31, 2024"
+RE_PERIOD_HEADER = re.compile(r"\b(?:for|to)\s+[A-Za-z]{3,9}\s+\d{1,2},\s*(\d{4})\b", re.I)
 IS_HEADER_ROW = re.compile(r"^\s*Date\s+Description\s+Amount\s*$", re.I)
 IS_SECTION_DEPOSITS = re.compile(r"\bDeposits and other credits\b", re.I)
 IS_SECTION_WITHDRAWALS = re.compile(r"\bWithdrawals and other debits\b", re.I)
@@ -27,9 +31,10 @@ class BOFARelationshipParser(BaseBankParser):
     """
     key = "bofa_relationship"
     version = "2025.10.03.v1"
+    __slots__ = ()
 
-    def parse(self, pdf_bytes: bytes, full_text: str) -> List[Dict[str, Any]]:
-        lines = extract_lines(pdf_bytes)
+    def parse(self, pdf: BinaryIO, full_text: str) -> List[Dict[str, Any]]:
+        lines = split_lines(full_text)
         year = detect_year(full_text) or self._detect_year_from_header(full_text)
 
         # Pre-split: si el extractor de texto pegó varias transacciones en una línea,
@@ -65,8 +70,9 @@ class BOFARelationshipParser(BaseBankParser):
                 continue
 
             # Transacción: bloque comenzando por fecha MM/DD/YY
-            if section and DATE_LINE.match(ln):
-                date = self._parse_date_from_line(ln, year)
+            m = DATE_LINE.match(ln) if section else None
+            if m:
+                date = self._date_from_match(m)
                 block = [ln]
                 i += 1
 
@@ -107,13 +113,10 @@ class BOFARelationshipParser(BaseBankParser):
             return True
         return False
 
-    def _parse_date_from_line(self, line: str, fallback_year: int) -> str:
-        # Reutilizamos utilidades de base por robustez
-        return (
-            parse_mmdd_token(line, fallback_year)
-            or parse_long_date(line)
-            or parse_mmmdd(line, fallback_year)
-        )
+    def _date_from_match(self, m: re.Match) -> str:
+        # Mismo resultado que parse_mmdd_token: el año de 2 dígitos siempre está (20YY)
+        mm, dd, yy = m.groups()
+        return f"{2000 + int(yy):04d}-{int(mm):02d}-{int(dd):02d}"
 
     def _block_to_tx(self, block_lines: List[str], date: str, section: str) -> Optional[Dict[str, Any]]:
         text = " ".join(block_lines)
@@ -127,18 +130,10 @@ class BOFARelationshipParser(BaseBankParser):
             return None
 
         last_amt = amts[-1]
-        amt_clean = (
-            last_amt.replace("$", "")
-                    .replace(",", "")
-                    .replace("(", "")
-                    .replace(")", "")
-                    .replace("-", "")
-                    .strip()
-        )
-        try:
-            amount = float(amt_clean)
-        except:
+        amount = parse_amount(last_amt)
+        if amount is None:
             return None
+        amount = abs(amount)
 
         # Quitar el monto de cola de la descripción si está al final
         desc = re.sub(re.escape(last_amt) + r"\s*$", "", text_wo_date).strip()
@@ -153,8 +148,8 @@ class BOFARelationshipParser(BaseBankParser):
     def _split_concatenated_by_date(self, lines: List[str]) -> List[str]:
         out: List[str] = []
         for ln in lines:
-            if len(ln) > 220 and re.search(r"\d{1,2}/\d{1,2}/\d{2}\s+\S", ln):
-                parts = re.split(r"(?=(\d{1,2}/\d{1,2}/\d{2}\s))", ln)
+            if len(ln) > 220 and RE_INNER_DATE.search(ln):
+                parts = RE_SPLIT_BEFORE_DATE.split(ln)
                 buf = ""
                 for p in parts:
                     if DATE_LINE.match(p.strip()):
@@ -172,7 +167,7 @@ class BOFARelationshipParser(BaseBankParser):
 
     def _detect_year_from_header(self, full_text: str) -> Optional[int]:
         # Intenta inferir "for October 1, 2024 to October 31, 2024"
-        m = re.search(r"\b(?:for|to)\s+[A-Za-z]{3,9}\s+\d{1,2},\s*(\d{4})\b", full_text, flags=re.I)
+        m = RE_PERIOD_HEADER.search(full_text)
         if m:
             try:
                 return int(m.group(1))
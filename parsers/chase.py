@@ -1,55 +1,141 @@
 import re
-from typing import List, Dict, Any, Optional
+from typing import BinaryIO, List, Dict, Any, Optional
 from .base import (
     BaseBankParser,
-    extract_lines,
+    split_lines,
     detect_year,
     RE_AMOUNT,
     parse_mmdd_token,
     parse_long_date,
     parse_mmmdd,
+    is_amount_or_account_line,
 )
 
+# Dirección por descripción (en minúsculas), en este orden de prioridad:
+# reversión (in) > comisiones (out) > créditos (in) > compras/pagos/wires (out)
+RE_DIR_REVERSAL = re.compile(r"\b(?:reversal|reversi[oó]n)\b")
+RE_DIR_FEE = re.compile(r" fee|charge|cargo|comisión")  # incluye "service charge"
+RE_DIR_IN = re.compile(r"\b(?:deposit|credit|incoming|ach credit|wire credit|zelle payment from)\b")
+RE_DIR_OUT = re.compile(
+    r"card purchase|compra con tarjeta"           # incluye "recurring card purchase"
+    r"|wise us inc|(?:^| )trnwise(?= |$)|\bwise\b"
+    r"|payment to|online payment|transferencia a"  # incluye "zelle payment to"
+    r"|wire transfer"                              # online domestic/international wire transfer
+    r"|d[eé]bito de c[aá]mara"
+)
+
+# Fecha MM/DD al inicio de la línea de transacción
+RE_TX_DATE = re.compile(r"^(\d{1,2})/(\d{1,2})(?:\s|$)")
+
+# "January 1, 2024 through ..." (texto en minúsculas): fila de saldos, no transacción
+RE_PERIOD_THROUGH = re.compile(
+    r"\b(january|february|march|april|may|june|july|august|september|october|november|december)\s+\d{1,2},\s+\d{4}\s+through\s+"
+)
+# Teléfonos: 1-800-... en textos legales y cualquier NNN-NNN-NNNN (sus dígitos no son montos)
+RE_TOLL_FREE = re.compile(r"1-\d{3}-\d{3}-\d{4}")
+RE_PHONE = re.compile(r"\d{3}[-.\s]\d{3}[-.\s]\d{4}")
+
+# Encabezados de sección en un solo regex anclado al inicio de línea (re.M, así sirve
+# también para un finditer sobre todo el documento). El orden de las alternativas es la
+# prioridad: depósitos > retiros electrónicos > cargos (línea entera) > tarjeta.
+RE_SECTION = re.compile(
+    r"^(?:(?=.*?(?:depósitos y adiciones|deposits and additions))(?P<deposits>)"
+    r"|(?=.*?(?:retiros electrónicos|electronic withdrawals))(?P<electronic>)"
+    r"|(?:cargos|charges)$(?P<fees>)"
+    r"|(?=.*?(?:atm & debit card withdrawals|atm and debit card withdrawals|card purchases))(?P<card>))",
+    re.I | re.M,
+)
+SECTION_BY_GROUP = {"deposits": "deposits", "electronic": "withdrawals", "fees": "fees", "card": "withdrawals"}
+
+# Textos legales que empiezan con algo parecido a una fecha
+RE_LEGAL_MARKERS = re.compile(
+    r"llámenos al|call us at|en caso de errores|in case of errors|prepárese|prepare to provide", re.I
+)
+
+# Limpieza de descripción: todo lo que se borra va en una sola alternación
+# (montos, fechas MM/DD y encabezados de la tabla de saldos), luego las etiquetas
+# Trn:/Ssn: y por último el colapso de espacios
+RE_DESC_DROP = re.compile(
+    RE_AMOUNT.pattern
+    + r"|\b\d{1,2}/\d{1,2}\b"
+    + r"|\bDAILY ENDING BALANCE\b|\bFECHA\s+CANTIDAD\b|\bDATE\s+AMOUNT\b",
+    re.I,
+)
+RE_DESC_LABEL = re.compile(r"\b(?:(trn)|ssn):\s*", re.I)
+RE_WS = re.compile(r"\s+")
+
+# Textos legales del pie del extracto (bloques que no son transacciones)
+LEGAL_INDICATORS = (
+    "llámenos al 1-866-564-2262","call us at 1-866-564-2262",
+    "en caso de errores o preguntas","in case of errors or questions",
+    "prepárese para proporcionarnos","be prepared to give us",
+)
+# Palabras que indican una transacción real dentro de una fila con período
+KW_TX_HINTS = ("payment","deposit","transfer","purchase","withdrawal","fee")
+
+# Caracteres que se descartan al convertir un monto (el "-" se deja a propósito:
+# float() lo interpreta y "5.00-" sigue sin convertirse, igual que antes)
+AMOUNT_STRIP = str.maketrans("", "", "$,()")
+
+# Líneas que empiezan así son encabezados/totales/legales, nunca transacciones
+NOISE_PREFIXES = (
+    "jpmorgan chase bank","página","page",
+    "número de cuenta","account number",
+    "total de depósitos","total deposits",
+    "total de retiros","total withdrawals",
+    "total comisiones","total fees",
+    "saldo inicial","beginning balance",
+    "saldo final","ending balance",
+    "duplicate statement","customer service information",
+    "checking summary","how to avoid the monthly service fee",
+    "daily ending balance",
+    "en caso de errores","in case of errors",
+)
+# Los mismos prefijos agrupados por primera letra
+NOISE_BY_FIRST = {
+    c: tuple(p for p in NOISE_PREFIXES if p[0] == c) for c in {p[0] for p in NOISE_PREFIXES}
+}
+
 class ChaseParser(BaseBankParser):
     key = "chase"
+    __slots__ = ()
     
-    def parse(self, pdf_bytes: bytes, full_text: str) -> List[Dict[str, Any]]:
-        lines = extract_lines(pdf_bytes)
+    def parse(self, pdf: BinaryIO, full_text: str) -> List[Dict[str, Any]]:
+        lines = split_lines(full_text)
         year = detect_year(full_text)
         results: List[Dict[str, Any]] = []
         
-        current_section = None
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-            if not line.strip():
-                i += 1
-                continue
+        # Cada línea se clasifica una sola vez (sección / ruido / fecha):
+        # los loops de abajo solo leen estas etiquetas en vez de re-evaluar los helpers
+        sections = self._detect_sections(lines)
+        noise = [self._is_basic_noise(ln) for ln in lines]
+        dates = [self._extract_date(ln, year) for ln in lines]
 
-            section_detected = self._detect_section(line)
-            if section_detected:
-                current_section = section_detected
+        current_section = None
+        i, n = 0, len(lines)
+        while i < n:
+            if sections[i]:
+                current_section = sections[i]
                 i += 1
                 continue
 
-            if self._is_basic_noise(line):
+            if noise[i]:
                 i += 1
                 continue
 
-            date = self._extract_date(line, year)
+            date = dates[i]
             if not date:
                 i += 1
                 continue
 
-            transaction_block = [line]
+            transaction_block = [lines[i]]
             j = i + 1
             lines_without_content = 0
-            while j < len(lines):
-                next_line = lines[j]
-                if self._extract_date(next_line, year) or self._is_section_header(next_line):
+            while j < n:
+                if dates[j] or sections[j]:
                     break
-                if next_line.strip() and not self._is_basic_noise(next_line):
-                    transaction_block.append(next_line)
+                if not noise[j]:
+                    transaction_block.append(lines[j])
                     lines_without_content = 0
                 else:
                     lines_without_content += 1
@@ -67,68 +153,37 @@ class ChaseParser(BaseBankParser):
 
         return results
 
-    def _detect_section(self, line: str) -> Optional[str]:
-        line_lower = line.lower().strip()
-        if any(pattern in line_lower for pattern in [
-            "depósitos y adiciones", "deposits and additions"
-        ]):
-            return "deposits"
-        if any(pattern in line_lower for pattern in [
-            "retiros electrónicos", "electronic withdrawals",
-            "retiros electrÃ³nicos"
-        ]):
-            return "withdrawals"
-        if line_lower in ("cargos", "charges"):
-            return "fees"
-        if any(pattern in line_lower for pattern in [
-            "atm & debit card withdrawals", 
-            "atm and debit card withdrawals",
-            "card purchases"
-        ]):
-            return "withdrawals"
-        return None
-
-    def _is_section_header(self, line: str) -> bool:
-        return self._detect_section(line) is not None
+    def _detect_sections(self, lines: List[str]) -> List[Optional[str]]:
+        """Sección de cada línea (None si no es encabezado): un solo RE_SECTION.finditer sobre el texto unido."""
+        sections: List[Optional[str]] = [None] * len(lines)
+        line_at = {}
+        pos = 0
+        for k, ln in enumerate(lines):
+            line_at[pos] = k
+            pos += len(ln) + 1
+        for m in RE_SECTION.finditer("\n".join(lines)):
+            sections[line_at[m.start()]] = SECTION_BY_GROUP[m.lastgroup]
+        return sections
 
     def _is_basic_noise(self, line: str) -> bool:
-        line_lower = line.lower().strip()
+        line_lower = line.lower()
         if "*start*" in line_lower or "*end*" in line_lower:
             return True
-        basic_noise = [
-            "jpmorgan chase bank","página","page",
-            "número de cuenta","account number",
-            "total de depósitos","total deposits",
-            "total de retiros","total withdrawals",
-            "total comisiones","total fees",
-            "saldo inicial","beginning balance",
-            "saldo final","ending balance",
-            "duplicate statement","customer service information",
-            "checking summary","how to avoid the monthly service fee",
-            "daily ending balance"
-        ]
-        if any(line_lower.startswith(pattern) for pattern in basic_noise):
-            return True
-        if re.match(r"^\s*\$[\d,]+\.\d{2}\s*$", line):
-            return True
-        if re.match(r"^\s*\d{12,}\s*$", line):
+        # Solo los prefijos que comparten la primera letra; las transacciones (empiezan
+        # con dígito) no tienen candidatos y no llegan a startswith
+        prefixes = NOISE_BY_FIRST.get(line_lower[:1])
+        if prefixes and line_lower.startswith(prefixes):
             return True
-        if line_lower.startswith("en caso de errores") or line_lower.startswith("in case of errors"):
+        if is_amount_or_account_line(line):
             return True
         return False
 
     def _extract_date(self, line: str, year: int) -> Optional[str]:
-        line_stripped = line.strip()
-        line_lower = line_stripped.lower()
-        legal_markers = [
-            "llámenos al","call us at",
-            "en caso de errores","in case of errors",
-            "prepárese","prepare to provide",
-        ]
-        if any(marker in line_lower for marker in legal_markers):
+        # Rechazo rápido: sin dígito inicial no puede haber MM/DD (la mayoría de las líneas)
+        if not line[:1].isdigit():
             return None
-        m = re.match(r"^(\d{1,2})/(\d{1,2})(?:\s|$)", line_stripped)
-        if not m:
+        m = RE_TX_DATE.match(line)
+        if not m or RE_LEGAL_MARKERS.search(line):
             return None
         mm, dd = int(m.group(1)), int(m.group(2))
         if 1 <= mm <= 12 and 1 <= dd <= 31:
@@ -140,12 +195,14 @@ class ChaseParser(BaseBankParser):
     ) -> Optional[Dict[str, Any]]:
         if not block:
             return None
-        full_text = " ".join(s.strip() for s in block if s).strip()
+        full_text = " ".join(block)
         if not full_text:
             return None
-        if self._contains_legal_content(full_text) or self._is_daily_balance_entry(full_text):
+        # El bloque se une y se pasa a minúsculas una sola vez para todos los chequeos
+        text_lower = full_text.lower()
+        if self._contains_legal_content(full_text, text_lower) or self._is_daily_balance_entry(text_lower):
             return None
-        amount = self._extract_amount_from_block_improved(block, full_text)
+        amount = self._extract_amount_from_block_improved(full_text)
         if amount is None:
             return None
         description = self._clean_description(full_text)
@@ -159,72 +216,60 @@ class ChaseParser(BaseBankParser):
             "direction": direction
         }
 
-    def _is_daily_balance_entry(self, text: str) -> bool:
-        t = text.lower()
+    def _is_daily_balance_entry(self, t: str) -> bool:
         if "daily ending balance" in t:
             return True
-        if re.search(r"\b(january|february|march|april|may|june|july|august|september|october|november|december)\s+\d{1,2},\s+\d{4}\s+through\s+", t):
-            if not any(x in t for x in ("payment","deposit","transfer","purchase","withdrawal","fee")):
+        if RE_PERIOD_THROUGH.search(t):
+            if not any(x in t for x in KW_TX_HINTS):
                 return True
         return False
 
-    def _contains_legal_content(self, text: str) -> bool:
-        t = text.lower()
-        indicators = [
-            "llámenos al 1-866-564-2262","call us at 1-866-564-2262",
-            "en caso de errores o preguntas","in case of errors or questions",
-            "prepárese para proporcionarnos","be prepared to give us"
-        ]
-        if any(s in t for s in indicators):
+    def _contains_legal_content(self, text: str, t: str) -> bool:
+        if any(s in t for s in LEGAL_INDICATORS):
             return True
-        if len(text) > 500 and re.search(r"1-\d{3}-\d{3}-\d{4}", text):
+        if len(text) > 500 and RE_TOLL_FREE.search(text):
             return True
         return False
 
     # ---------------- AMOUNTS ----------------
 
-    def _extract_amount_from_block_improved(self, block: List[str], full_text: str) -> Optional[float]:
+    def _extract_amount_from_block_improved(self, full_text: str) -> Optional[float]:
         def clean_to_float(amt_str: str) -> Optional[float]:
-            clean = amt_str.replace("$", "").replace(",", "").replace("(", "").replace(")", "")
-            negative = "-" in amt_str or amt_str.strip().startswith("(")
+            clean = amt_str.translate(AMOUNT_STRIP)
+            negative = "-" in amt_str or amt_str[:1] == "("
             try:
                 val = float(clean)
                 return -val if negative else val
             except:
                 return None
 
-        def _is_in_phone_context(s: str, text: str) -> bool:
-            digits = s.replace(",", "").replace(".", "")
-            return bool(re.search(r"\d{3}[-.\s]\d{3}[-.\s]\d{4}", text)) and digits in text
+        # RE_AMOUNT no cruza espacios: un findall sobre el bloque unido da los mismos tokens que línea por línea
+        all_amounts = RE_AMOUNT.findall(full_text)
 
-        all_amounts = []
-        for line in block:
-            all_amounts.extend(RE_AMOUNT.findall(line))
-
-        floats = [
-            (a, clean_to_float(a))
-            for a in all_amounts
-            if clean_to_float(a) is not None and not _is_in_phone_context(a, full_text)
-        ]
-        if not floats:
-            return None
+        # Una sola pasada: cada token se convierte una vez y el teléfono se busca una vez por bloque
+        has_phone = bool(RE_PHONE.search(full_text))
+        # Máximo con "$" y máximo general en el mismo recorrido (sin listas ni lambdas)
+        best = best_dollar = None
+        for a in all_amounts:
+            val = clean_to_float(a)
+            if val is None:
+                continue
+            if has_phone and a.replace(",", "").replace(".", "") in full_text:
+                continue
+            if best is None or val > best:
+                best = val
+            if "$" in a and (best_dollar is None or val > best_dollar):
+                best_dollar = val
 
-        dollar_floats = [f for f in floats if "$" in f[0]]
-        if dollar_floats:
-            return max(dollar_floats, key=lambda x: x[1])[1]
-        return max(floats, key=lambda x: x[1])[1]
+        # Preferimos los montos con "$"; si no hay, el mayor de todos
+        return best_dollar if best_dollar is not None else best
 
     # ---------------- DESCRIPTION ----------------
 
     def _clean_description(self, text: str) -> str:
-        cleaned = re.sub(RE_AMOUNT.pattern, "", text)
-        cleaned = re.sub(r"\b\d{1,2}/\d{1,2}\b", "", cleaned)
-        cleaned = re.sub(r"\bDAILY ENDING BALANCE\b", "", cleaned, flags=re.I)
-        cleaned = re.sub(r"\bFECHA\s+CANTIDAD\b", "", cleaned, flags=re.I)
-        cleaned = re.sub(r"\bDATE\s+AMOUNT\b", "", cleaned, flags=re.I)
-        cleaned = re.sub(r"\btrn:\s*", " Trn: ", cleaned, flags=re.I)
-        cleaned = re.sub(r"\bssn:\s*", " Ssn: ", cleaned, flags=re.I)
-        cleaned = re.sub(r"\s+", " ", cleaned).strip()
+        cleaned = RE_DESC_DROP.sub("", text)
+        cleaned = RE_DESC_LABEL.sub(lambda m: " Trn: " if m.group(1) else " Ssn: ", cleaned)
+        cleaned = RE_WS.sub(" ", cleaned).strip()
         if cleaned:
             cleaned = cleaned[0].upper() + cleaned[1:]
         return cleaned
@@ -235,21 +280,13 @@ class ChaseParser(BaseBankParser):
         self, description: str, section_context: str, amount: float, full_text: str
     ) -> str:
         d = description.lower()
-        if re.search(r"\b(reversal|reversi[oó]n)\b", d):
+        if RE_DIR_REVERSAL.search(d):
             return "in"
-        if any(x in d for x in [" fee","charge","cargo","comisión","service charge"]):
+        if RE_DIR_FEE.search(d):
             return "out"
-        if re.search(r"\b(deposit|credit|incoming|ach credit|wire credit|zelle payment from)\b", d):
+        if RE_DIR_IN.search(d):
             return "in"
-        if "card purchase" in d or "compra con tarjeta" in d or "recurring card purchase" in d:
-            return "out"
-        if "wise us inc" in d or " trnwise " in f" {d} " or re.search(r"\bwise\b", d):
-            return "out"
-        if any(x in d for x in ["payment to","zelle payment to","online payment",
-                                "transferencia a","wire transfer","online domestic wire transfer",
-                                "online international wire transfer"]):
-            return "out"
-        if re.search(r"d[eé]bito de c[aá]mara", d):
+        if RE_DIR_OUT.search(d):
             return "out"
         if section_context == "deposits":
             return "in"
@@ -1,72 +1,146 @@
 import re
-from typing import List, Dict, Any, Optional
+from typing import BinaryIO, List, Dict, Any, Optional
 from .base import (
     BaseBankParser,
-    extract_lines,
+    split_lines,
     detect_year,
     RE_AMOUNT,
+    is_amount_or_account_line,
 )
 
+# Palabras clave de dirección; IN se evalúa antes que OUT
+KW_CITI_IN = (
+    "electronic credit", "deposit", "interest paid", "interest credit",
+    "wire from", "funds transfer from", "misc deposit", "reversal",
+)
+KW_CITI_OUT = (
+    # fees and charges
+    "service charge", "fee for", "incoming wire fee", "monthly maintenance fee",
+    "foreign transaction fee", "acct analysis direct db", "federal withholding tax",
+    # debits, wires, withdrawals
+    "debit card purch",  # Note: PURCH not CREDIT
+    "ach debit", "funds trn out",
+    "int'l wire out", "international wire out",
+    "cbusol transfer debit", "cbusol international wire out",
+    "cbol wire to", "cbusol wire to",
+    "withdrawal", "instant payment debit", "other/withdrawal",
+    "wire to",
+)
+# Savings con un solo monto: la dirección sale de estas palabras
+KW_SAVINGS_IN = ("interest", "deposit", "credit", "reversal")
+KW_SAVINGS_OUT = ("fee", "withdrawal", "debit", "withholding")
+
+# Fecha MM/DD al inicio de la línea de transacción
+RE_TX_DATE = re.compile(r"^(\d{1,2})/(\d{1,2})(?:\s|[A-Za-z])")
+# Column headers / totals
+COLUMN_HEADERS = (
+    "date description debits credits balance",
+    "date description amount subtracted amount added balance",
+    "beginning balance:", "ending balance:", "balance subject",
+    "average daily collected balance",
+    "type of charge", "charges debited from account",
+    "total charges for services", "net service charge",
+    "total debits/credits", "total subtracted/added",
+)
+# Bloques que son metadatos/encabezados y no transacciones
+METADATA_INDICATORS = (
+    "account as of",
+    "statement period",
+    "service charge summary",
+    "average daily collected balance",
+    "relationship summary",
+    "checking summary",
+)
+KW_TRANSACTION = (
+    "deposit", "credit", "debit", "wire", "transfer", "payment",
+    "purchase", "withdrawal", "fee", "charge", "interest",
+)
+LEGAL_INDICATORS = (
+    "in case of errors", "customer service", "important disclosures",
+    "fdic insurance", "apy and interest rate", "billing rights summary",
+)
+# Bloque que arranca con fecha + nombre de empresa (encabezado de cuenta)
+RE_COMPANY_HEADER = re.compile(r"^\d{1,2}/\d{1,2}\s+[A-Z\s]+(?:LLC|INC|CORP|COMPANY)")
+# "January 1, 2024 through ..." (texto en minúsculas)
+RE_PERIOD_THROUGH = re.compile(
+    r"\b(january|february|march|april|may|june|july|august|september|october|november|december)\s+\d{1,2},\s+\d{4}\s+through\s+"
+)
+
+# Specific patterns that indicate headers/metadata (not transactions)
+NOISE_PATTERNS = (
+    r"^citibank",
+    r"^citibusiness",
+    r"relationship summary",
+    r"checking summary",
+    r"customer service information",
+    r"^page \d+",
+    r"^account \d+",
+    r"^statement period",
+    r"service charge summary from",
+    r"^important notice",
+    r"^important disclosures",
+    r"^fdic insurance",
+    r"^apy and interest rate",
+    r"billing rights summary",
+    r"in case of errors",
+    r"^messages from citi",
+    r"value of accounts this period",
+    r"earnings summary",
+    r"we are notifying",
+    r"^effective",
+    r"^account as of",
+    r"citibusiness® account as of",
+    r"^\w+ \d+,? - \w+ \d+,? \d{4}",  # Statement period dates
+    r"^\d{4} de citi",  # Spanish date patterns
+)
+# Todas en una sola alternación: una pasada por línea en vez de una búsqueda por patrón
+RE_NOISE = re.compile("|".join(f"(?:{p})" for p in NOISE_PATTERNS))
+
+# Caracteres que se descartan al convertir un monto (el "-" lo interpreta float())
+AMOUNT_STRIP = str.maketrans("", "", "$,()")
+
+def _amount_to_float(amt_str: str) -> Optional[float]:
+    """Token de RE_AMOUNT -> float; "(x)" y "-x" marcan negativo. Los tokens no traen espacios."""
+    neg = (amt_str[:1] == "(" and amt_str[-1:] == ")") or amt_str[:1] == "-"
+    try:
+        v = float(amt_str.translate(AMOUNT_STRIP))
+        return -v if neg else v
+    except:
+        return None
+
 class CitiParser(BaseBankParser):
     key = "citi"
+    __slots__ = ()
 
-    def parse(self, pdf_bytes: bytes, full_text: str) -> List[Dict[str, Any]]:
-        lines = extract_lines(pdf_bytes)
+    def parse(self, pdf: BinaryIO, full_text: str) -> List[Dict[str, Any]]:
+        lines = split_lines(full_text)
         year = detect_year(full_text)
         results: List[Dict[str, Any]] = []
 
-        current_section = None
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-            if not line or not line.strip():
-                i += 1
-                continue
+        # Límites de bloque: toda línea con fecha o encabezado de sección corta el bloque
+        # anterior. Se calculan una sola vez; cada bloque va de un límite al siguiente.
+        sections = [self._detect_section(ln) for ln in lines]
+        dates = [self._extract_date(ln, year) for ln in lines]
+        bounds = [k for k, (sec, d) in enumerate(zip(sections, dates)) if sec or d]
+        ends = bounds[1:] + [len(lines)]
 
-            sec = self._detect_section(line)
-            if sec:
-                current_section = sec
-                i += 1
+        current_section = None
+        for start, end in zip(bounds, ends):
+            if sections[start]:
+                current_section = sections[start]
                 continue
 
+            line = lines[start]
             if self._is_noise(line):
-                i += 1
-                continue
-
-            tx_date = self._extract_date(line, year)
-            if not tx_date:
-                i += 1
                 continue
 
             # build transaction block
-            block = [line]
-            j = i + 1
-            blanks = 0
-            while j < len(lines):
-                nxt = lines[j]
-                if not nxt or not nxt.strip():
-                    blanks += 1
-                    if blanks >= 2:
-                        break
-                    j += 1
-                    continue
-                if self._extract_date(nxt, year):
-                    break
-                if self._detect_section(nxt):
-                    break
-                if self._is_noise(nxt):
-                    j += 1
-                    continue
-                block.append(nxt)
-                blanks = 0
-                j += 1
-
-            tx = self._process_block(block, tx_date, current_section, year)
+            block = [line] + [nxt for nxt in lines[start + 1:end] if not self._is_noise(nxt)]
+
+            tx = self._process_block(block, dates[start], current_section, year)
             if tx:
                 results.append(tx)
 
-            i = j
-
         return results
 
     # -------------------- Section & noise --------------------
@@ -88,58 +162,18 @@ class CitiParser(BaseBankParser):
         return None
 
     def _is_noise(self, line: str) -> bool:
-        l = line.lower().strip()
+        l = line.lower()
         
         # Specific patterns that indicate headers/metadata (not transactions)
-        noise_patterns = [
-            r"^citibank",
-            r"^citibusiness",
-            r"relationship summary",
-            r"checking summary",
-            r"customer service information",
-            r"^page \d+",
-            r"^account \d+",
-            r"^statement period",
-            r"service charge summary from",
-            r"^important notice",
-            r"^important disclosures",
-            r"^fdic insurance",
-            r"^apy and interest rate",
-            r"billing rights summary",
-            r"in case of errors",
-            r"^messages from citi",
-            r"value of accounts this period",
-            r"earnings summary",
-            r"we are notifying",
-            r"^effective",
-            r"^account as of",
-            r"citibusiness® account as of",
-            r"^\w+ \d+,? - \w+ \d+,? \d{4}",  # Statement period dates
-            r"^\d{4} de citi",  # Spanish date patterns
-        ]
-        
-        for pattern in noise_patterns:
-            if re.search(pattern, l):
-                return True
+        if RE_NOISE.search(l):
+            return True
 
         # Column headers
-        if any(h in l for h in [
-            "date description debits credits balance",
-            "date description amount subtracted amount added balance",
-            "beginning balance:", "ending balance:", "balance subject", 
-            "average daily collected balance",
-            "type of charge", "charges debited from account", 
-            "total charges for services", "net service charge",
-            "total debits/credits", "total subtracted/added",
-        ]):
+        if any(h in l for h in COLUMN_HEADERS):
             return True
 
-        # Standalone amounts (not part of transaction description)
-        if re.match(r"^\s*\$[\d,]+\.\d{2}\s*$", line):
-            return True
-        
-        # Account numbers
-        if re.match(r"^\s*\d{12,}\s*$", line):
+        # Standalone amounts (not part of transaction description) / account numbers
+        if is_amount_or_account_line(line):
             return True
 
         return False
@@ -147,8 +181,10 @@ class CitiParser(BaseBankParser):
     # -------------------- Date & block --------------------
 
     def _extract_date(self, line: str, year: int) -> Optional[str]:
-        s = line.strip()
-        m = re.match(r"^(\d{1,2})/(\d{1,2})(?:\s|[A-Za-z])", s)
+        # Rechazo rápido: sin dígito inicial no puede haber MM/DD (la mayoría de las líneas)
+        if not line[:1].isdigit():
+            return None
+        m = RE_TX_DATE.match(line)
         if not m:
             return None
         mm, dd = int(m.group(1)), int(m.group(2))
@@ -165,7 +201,7 @@ class CitiParser(BaseBankParser):
     ) -> Optional[Dict[str, Any]]:
         if not block:
             return None
-        full = " ".join(x.strip() for x in block if x).strip()
+        full = " ".join(block)
         if not full:
             return None
 
@@ -204,27 +240,13 @@ class CitiParser(BaseBankParser):
         t = text.lower()
         
         # Check for patterns that indicate this is not a transaction
-        metadata_indicators = [
-            "account as of",
-            "statement period",
-            "service charge summary",
-            "average daily collected balance",
-            "relationship summary",
-            "checking summary",
-        ]
-        
-        for indicator in metadata_indicators:
-            if indicator in t:
-                return True
+        if any(indicator in t for indicator in METADATA_INDICATORS):
+            return True
         
         # If it contains account name/company name at the beginning without transaction keywords
-        if re.match(r"^\d{1,2}/\d{1,2}\s+[A-Z\s]+(?:LLC|INC|CORP|COMPANY)", text):
+        if RE_COMPANY_HEADER.match(text):
             # But has no transaction keywords
-            transaction_keywords = [
-                "deposit", "credit", "debit", "wire", "transfer", "payment",
-                "purchase", "withdrawal", "fee", "charge", "interest"
-            ]
-            if not any(kw in t for kw in transaction_keywords):
+            if not any(kw in t for kw in KW_TRANSACTION):
                 return True
         
         return False
@@ -264,23 +286,10 @@ class CitiParser(BaseBankParser):
         if not matches:
             return None
 
-        def clean_to_float(amt_str: str) -> Optional[float]:
-            neg = False
-            if amt_str.strip().startswith("(") and amt_str.strip().endswith(")"):
-                neg = True
-            if amt_str.strip().startswith("-"):
-                neg = True
-            clean = amt_str.replace("$", "").replace(",", "").replace("(", "").replace(")", "").strip()
-            try:
-                v = float(clean)
-                return -v if neg else v
-            except:
-                return None
-
         # Parse all amounts
         amounts = []
         for match in matches:
-            val = clean_to_float(match.group())
+            val = _amount_to_float(match.group())
             if val is not None:
                 amounts.append((val, match.start()))
 
@@ -327,9 +336,9 @@ class CitiParser(BaseBankParser):
             amount = abs(transaction_amounts[0][0])
             
             # Determine direction from keywords
-            if any(k in text_lower for k in ["interest", "deposit", "credit", "reversal"]):
+            if any(k in text_lower for k in KW_SAVINGS_IN):
                 direction = "in"
-            elif any(k in text_lower for k in ["fee", "withdrawal", "debit", "withholding"]):
+            elif any(k in text_lower for k in KW_SAVINGS_OUT):
                 direction = "out"
             else:
                 direction = "in" if transaction_amounts[0][0] > 0 else "out"
@@ -365,23 +374,10 @@ class CitiParser(BaseBankParser):
         if not matches:
             return None
 
-        def clean_to_float(amt_str: str) -> Optional[float]:
-            neg = False
-            if amt_str.strip().startswith("(") and amt_str.strip().endswith(")"):
-                neg = True
-            if amt_str.strip().startswith("-"):
-                neg = True
-            clean = amt_str.replace("$", "").replace(",", "").replace("(", "").replace(")", "").strip()
-            try:
-                v = float(clean)
-                return -v if neg else v
-            except:
-                return None
-
         # Parse all amounts with their positions
         amounts = []
         for match in matches:
-            val = clean_to_float(match.group())
+            val = _amount_to_float(match.group())
             if val is not None:
                 amounts.append((val, match.start(), match.end()))
 
@@ -443,26 +439,19 @@ class CitiParser(BaseBankParser):
         t = text.lower()
         if "daily ending balance" in t:
             return True
-        if re.search(
-            r"\b(january|february|march|april|may|june|july|august|september|october|november|december)\s+\d{1,2},\s+\d{4}\s+through\s+",
-            t
-        ):
+        if RE_PERIOD_THROUGH.search(t):
             if not any(k in t for k in ("deposit", "credit", "debit", "purchase", "withdrawal", "wire", "fee", "interest")):
                 return True
         return False
 
     def _contains_legal(self, text: str) -> bool:
         t = text.lower()
-        indicators = [
-            "in case of errors", "customer service", "important disclosures",
-            "fdic insurance", "apy and interest rate", "billing rights summary",
-        ]
-        return any(s in t for s in indicators)
+        return any(s in t for s in LEGAL_INDICATORS)
 
     # -------------------- Description cleanup --------------------
 
     def _clean_description(self, text: str) -> str:
-        cleaned = re.sub(RE_AMOUNT.pattern, "", text)
+        cleaned = RE_AMOUNT.sub("", text)
         cleaned = re.sub(r"\b\d{1,2}/\d{1,2}\b", "", cleaned)
         cleaned = re.sub(r"\bDATE\s+DESCRIPTION\s+.*BALANCE\b", "", cleaned, flags=re.I)
         cleaned = re.sub(r"\bBEGINNING BALANCE\b|\bENDING BALANCE\b", "", cleaned, flags=re.I)
@@ -487,31 +476,11 @@ class CitiParser(BaseBankParser):
             return "in"
         
         # Incoming transactions
-        if any(k in d for k in [
-            "electronic credit", "deposit", "interest paid", "interest credit", 
-            "wire from", "funds transfer from", "misc deposit", "reversal"
-        ]):
+        if any(k in d for k in KW_CITI_IN):
             return "in"
         
-        # Outgoing transactions - fees and charges
-        if any(k in d for k in [
-            "service charge", "fee for", "incoming wire fee", "monthly maintenance fee",
-            "foreign transaction fee", "acct analysis direct db", "federal withholding tax"
-        ]):
-            return "out"
-        
-        # Outgoing transactions - debits, wires, withdrawals
-        if any(k in d for k in [
-            "debit card purch",  # Note: PURCH not CREDIT
-            "ach debit", "funds trn out", 
-            "int'l wire out", "international wire out", 
-            "cbusol transfer debit", "cbusol international wire out",
-            "cbol wire to", "cbusol wire to",
-            "withdrawal", "instant payment debit", "other/withdrawal"
-        ]):
-            return "out"
-        
-        if "wire to" in d:
+        # Outgoing transactions - fees, charges, debits, wires, withdrawals
+        if any(k in d for k in KW_CITI_OUT):
             return "out"
         
         # Default: use amount sign
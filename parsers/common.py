@@ -1,4 +1,5 @@
 import re
+from operator import itemgetter
 from typing import List, Dict, Any
 
 # Reglas refinadas para direction
@@ -33,26 +34,39 @@ DIR_RULES = [
     (r"\bPAYPAL.*CREDIT\b", "in"),
 ]
 
+# Todas las reglas OUT preceden a las IN en DIR_RULES, así que basta con una
+# sola alternancia por dirección: una pasada del motor por descripción.
+RE_DIR_OUT = re.compile("|".join(f"(?:{p})" for p, dd in DIR_RULES if dd == "out"), re.I)
+RE_DIR_IN = re.compile("|".join(f"(?:{p})" for p, dd in DIR_RULES if dd == "in"), re.I)
+
 def decide_direction(description: str, signed_amount: float) -> str:
-    d = description.upper()
-    for pat, dd in DIR_RULES:
-        if re.search(pat, d, flags=re.I):
-            return dd
+    if RE_DIR_OUT.search(description):
+        return "out"
+    if RE_DIR_IN.search(description):
+        return "in"
     return "unknown"  # mejor que asumir mal
 
 def normalize_transactions(txs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     out = []
+    # Las descripciones se repiten mucho (comisiones, comercios recurrentes):
+    # decide_direction solo depende de la descripción, así que se evalúa una vez por texto único
+    dir_cache: Dict[str, str] = {}
     for t in txs:
         amt = float(t["amount"])
         desc = t.get("description", "")
-        signed = amt if amt >= 0 else -amt
-        direction = t.get("direction") or decide_direction(desc, signed)
+        direction = t.get("direction")
+        if not direction:
+            direction = dir_cache.get(desc)
+            if direction is None:
+                signed = amt if amt >= 0 else -amt
+                direction = dir_cache[desc] = decide_direction(desc, signed)
         out.append({
             "date": t["date"],
             "description": desc.strip(),
             "amount": abs(amt),
             "direction": direction
         })
-    out.sort(key=lambda x: x["date"])
+    # Las fechas son ISO (YYYY-MM-DD): el orden de strings ya es el cronológico
+    out.sort(key=itemgetter("date"))
     return out
 
@@ -1,37 +1,23 @@
-from typing import List, Dict, Any
+from typing import BinaryIO, List, Dict, Any
 import re
-from .base import BaseBankParser, extract_lines, detect_year, parse_mmdd_token, parse_long_date, parse_mmmdd, RE_AMOUNT, pick_amount, clean_desc_remove_amount
+from .base import BaseBankParser, split_lines, detect_year, any_date_blocks, first_amount, clean_desc_remove_amount
 
 class IFBParser(BaseBankParser):
     key = "ifb"
+    __slots__ = ()
 
-    def parse(self, pdf_bytes: bytes, full_text: str) -> List[Dict[str, Any]]:
-        lines = extract_lines(pdf_bytes)
+    def parse(self, pdf: BinaryIO, full_text: str) -> List[Dict[str, Any]]:
+        lines = split_lines(full_text)
         y = detect_year(full_text)
         txs: List[Dict[str, Any]] = []
-        i, n = 0, len(lines)
-
-        while i < n:
-            line = lines[i]
-            date = parse_mmdd_token(line, y) or parse_long_date(line) or parse_mmmdd(line, y)
-            if not date:
-                i += 1; continue
-
-            block = [line]
-            j = i+1
-            while j < n:
-                # corta cuando próxima línea es otra fecha (nuevo item)
-                if parse_mmdd_token(lines[j], y) or parse_long_date(lines[j]) or parse_mmmdd(lines[j], y):
-                    break
-                block.append(lines[j]); j += 1
 
+        # Cada bloque va de una fecha hasta la próxima (nuevo item)
+        for date, block in any_date_blocks(lines, y):
             text = " ".join(block)
-            amts = RE_AMOUNT.findall(text)
             # Heurística IFB: primer número = monto (luego viene Balance)
-            amt = pick_amount(amts, prefer_first=True)
+            amt = first_amount(text)
             if amt is not None:
                 desc = clean_desc_remove_amount(text)
                 txs.append({"date": date, "description": desc, "amount": amt})
 
-            i = j
         return txs
@@ -1,35 +1,33 @@
-from typing import List, Dict, Any
+from typing import BinaryIO, List, Dict, Any
 import re
-from .base import BaseBankParser, extract_lines, detect_year, parse_mmdd_token, parse_long_date, parse_mmmdd, RE_AMOUNT, pick_amount, clean_desc_remove_amount
+from .base import (
+    BaseBankParser, split_lines, detect_year, date_blocks, parse_any_date, first_amount, clean_desc_remove_amount,
+    PAT_DATE_SLASH, PAT_DATE_LONG, PAT_DATE_MMMDD,
+)
+
+# En Mercury muchas filas empiezan con "Feb 01", "Feb 06", etc.: esa forma va primero
+RE_DATE_MERCURY = re.compile("|".join((PAT_DATE_MMMDD, PAT_DATE_SLASH, PAT_DATE_LONG)), re.I)
 
 class MercuryParser(BaseBankParser):
     key = "mercury"
+    __slots__ = ()
 
-    def parse(self, pdf_bytes: bytes, full_text: str) -> List[Dict[str, Any]]:
+    def parse(self, pdf: BinaryIO, full_text: str) -> List[Dict[str, Any]]:
         # Mercury trae encabezado tipo "February 1–February 29, 2024" -> usamos el año
         y = detect_year(full_text)
-        lines = extract_lines(pdf_bytes)
+        lines = split_lines(full_text)
         txs: List[Dict[str, Any]] = []
 
-        i, n = 0, len(lines)
-        while i < n:
-            line = lines[i]
-            # En Mercury muchas filas empiezan con "Feb 01", "Feb 06", etc.
-            date = parse_mmmdd(line, y) or parse_mmdd_token(line, y) or parse_long_date(line)
-            if not date:
-                i += 1; continue
-
-            block = [line]; j = i+1
-            while j < n and not (parse_mmmdd(lines[j], y) or parse_mmdd_token(lines[j], y) or parse_long_date(lines[j])):
-                block.append(lines[j]); j += 1
+        # mmmdd -> mm/dd -> fecha larga, con un solo match por línea
+        def parse_date(ln: str):
+            return parse_any_date(ln, y, RE_DATE_MERCURY)
 
+        for date, block in date_blocks(lines, parse_date):
             text = " ".join(block)
-            amts = RE_AMOUNT.findall(text)
             # Heurística Mercury: primer número = monto (balance al final)
-            amt = pick_amount(amts, prefer_first=True)
+            amt = first_amount(text)
             if amt is not None:
                 desc = clean_desc_remove_amount(text)
                 txs.append({"date": date, "description": desc, "amount": amt})
-            i = j
 
         return txs
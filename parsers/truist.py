@@ -1,17 +1,17 @@
 import re
-from typing import List, Dict, Any
+from typing import BinaryIO, List, Dict, Any
 from .base import (
     BaseBankParser,
-    extract_lines,
+    split_lines,
     detect_year,
     parse_mmdd_token,
-    RE_AMOUNT,
-    pick_amount,
+    first_amount,
     clean_desc_remove_amount,
 )
 
 class TruistParser(BaseBankParser):
     key = "truist"
+    __slots__ = ()
 
     SECTION_DEPOSITS = re.compile(r"Deposits.*credits", re.I)
     SECTION_WITHDRAWALS = re.compile(r"(Other withdrawals|Debits|Service charges)", re.I)
@@ -19,8 +19,8 @@ class TruistParser(BaseBankParser):
     KW_OUT = re.compile(r"(zelle|payment to|iat|debit|withdrawal|ach|bill pay)", re.I)
     KW_IN = re.compile(r"(deposit|credit|interest|paypal\s+\d+)", re.I)
 
-    def parse(self, pdf_bytes: bytes, full_text: str) -> List[Dict[str, Any]]:
-        lines = extract_lines(pdf_bytes)
+    def parse(self, pdf: BinaryIO, full_text: str) -> List[Dict[str, Any]]:
+        lines = split_lines(full_text)
         year = detect_year(full_text)
 
         results: List[Dict[str, Any]] = []
@@ -41,8 +41,7 @@ class TruistParser(BaseBankParser):
                 continue
 
             # Buscar montos en la línea
-            amts = RE_AMOUNT.findall(ln)
-            amt = pick_amount(amts, prefer_first=True)
+            amt = first_amount(ln)
             if amt is None:
                 continue
 
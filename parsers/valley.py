@@ -1,36 +1,33 @@
 import re
-from typing import List, Dict, Any
-from .base import BaseBankParser, extract_lines, parse_mmdd_token, RE_AMOUNT, pick_amount, clean_desc_remove_amount
+from typing import BinaryIO, List, Dict, Any
+from .base import BaseBankParser, split_lines, parse_mmdd_token, first_amount, clean_desc_remove_amount
 
 class ValleyParser(BaseBankParser):
     key = "valley"
+    __slots__ = ()
 
-    def parse(self, pdf_bytes: bytes, full_text: str) -> List[Dict[str, Any]]:
-        lines = extract_lines(pdf_bytes)
+    def parse(self, pdf: BinaryIO, full_text: str) -> List[Dict[str, Any]]:
+        lines = split_lines(full_text)
         year = self.infer_year(full_text)
 
         results: List[Dict[str, Any]] = []
         i, n = 0, len(lines)
+        # Una sola pasada de fechas: el bloque interno no vuelve a parsear cada línea
+        dates = [parse_mmdd_token(ln, year) for ln in lines]
 
         while i < n:
-            line = lines[i]
-            date = parse_mmdd_token(line, year)
+            date = dates[i]
             if not date:
                 i += 1
                 continue
 
-            # armar bloque hasta próxima fecha
-            block = [line]
+            # armar bloque hasta próxima fecha (o una línea demasiado larga)
             j = i + 1
-            while j < n and not parse_mmdd_token(lines[j], year):
-                if len(lines[j]) > 250:
-                    break
-                block.append(lines[j])
+            while j < n and not dates[j] and len(lines[j]) <= 250:
                 j += 1
 
-            text = " ".join(block)
-            amts = RE_AMOUNT.findall(text)
-            amt = pick_amount(amts, prefer_first=True)
+            text = " ".join(lines[i:j])
+            amt = first_amount(text)
 
             if amt is not None:
                 desc = clean_desc_remove_amount(text)
@@ -1,13 +1,12 @@
 import re
-from typing import List, Dict, Any
+from typing import BinaryIO, List, Dict, Any
 from .base import (
     BaseBankParser,
-    extract_lines,
+    split_lines,
     detect_year,
     RE_AMOUNT,
-    parse_mmdd_token,
-    parse_long_date,
-    parse_mmmdd,
+    parse_any_date,
+    parse_amount,
 )
 
 # Reglas de dirección (orden de prioridad: IN/OUT explícitas antes que fallback)
@@ -41,50 +40,79 @@ RE_NO_TX = re.compile(
     re.I
 )
 
-def _looks_like_date_fragment(amount_str: str, context: str = "") -> bool:
-    """
-    Determina si un monto parece ser parte de una fecha en lugar de un monto real.
-    Ej: "11.8" en "11.8.24" es una fecha, pero "1.97" en "Interest Payment" es un monto real.
-    """
-    clean = amount_str.replace("$", "").replace(",", "").replace("(", "").replace(")", "").replace("-", "")
+# Fechas dentro del contexto de un monto (_date_like_context)
+RE_DATE_DOTTED = re.compile(r"\b\d{1,2}\.\d{1,2}\.\d{2,4}\b")
+RE_DATE_MON_DAY = re.compile(r"\b(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\s+\d{1,2}\b", re.I)
+
+# Líneas de metadatos (página, números de cuenta, etc.)
+RE_META_LINE = re.compile(r"page \d+ of \d+|account number:|for direct deposit|for wire transfers|routing number")
+
+# Headers típicos de Wells Fargo
+KW_HEADERS = (
+    "wells fargo", "questions?", "available by phone", "online:", "write:",
+    "your business and wells fargo", "account options", "business online banking",
+    "overdraft protection", "important account information", "new york city customers",
+    "updated limits", "effective october", "this notice", "watch for debit card scams",
+)
+# Líneas de summary/totals (pero NO monthly service fee que es una transacción real)
+KW_SUMMARY = (
+    "statement period activity", "beginning balance", "ending balance",
+    "deposits/credits", "withdrawals/debits", "totals",
+    "account transaction fees", "service charge description",
+    "units used", "units included", "excess units", "total service",
+    "fee period", "how to avoid", "minimum required", "average ledger",
+    "minimum daily balance", "standard monthly service fee",
+)
+# Headers + summary + metadatos en una sola alternación (una pasada, sin .lower() por línea)
+RE_NOT_TX_LINE = re.compile(
+    "|".join(map(re.escape, KW_HEADERS + KW_SUMMARY)) + "|" + RE_META_LINE.pattern, re.I
+)
+
+# Patrones auxiliares de _determine_direction (se aplican sobre el texto ya en minúsculas)
+RE_FROM_ENTITY = re.compile(r"\bfrom\s+\w+")
+RE_COMPANY_PAYMENT = re.compile(r"\w+\s+company\s+payment|\bpayment\s+\w+\s+\d+")
+RE_WT = re.compile(r"\bwt\s+\w+")
+
+# Palabras clave de entrada para _determine_direction (tuplas de módulo: no se rearman por llamada)
+KW_TRANSFER_IN = (
+    "online transfer from",  # "Online Transfer From Baxsan, LLC..."
+    "transfer from",         # General transfers coming in
+    "llc sender",            # "Baxsan, LLC Sender..."
+    "sender",                # General sender patterns
+)
+KW_CREDIT_IN = (
+    "interest payment", "interest credit", "deposit",
+    "credit",  # pero no "credit card"
+)
+
+# Caracteres que se descartan de un token de monto antes de convertirlo
+AMOUNT_STRIP = str.maketrans("", "", "$,()-")
+
+# Palabras que indican que el texto tiene un monto real (no una fecha)
+KW_AMOUNT_CONTEXT = (
+    "interest payment", "interest credit", "fee", "charge",
+    "payment", "credit", "debit", "service",
+)
+
+def _date_like_context(context: str) -> bool:
+    """El contexto contiene una fecha completa y ninguna palabra típica de un monto real."""
+    context_lower = context.lower()
+    if any(keyword in context_lower for keyword in KW_AMOUNT_CONTEXT):
+        return False
+    return bool(RE_DATE_DOTTED.search(context) or RE_DATE_MON_DAY.search(context))
+
+def _is_day_value(amount_str: str) -> bool:
+    """El monto podría ser un día del mes (1-31, a lo sumo 2 decimales)."""
+    clean = amount_str.translate(AMOUNT_STRIP)
     
     # Si tiene más de 2 decimales, probablemente no es una fecha
-    if "." in clean:
-        decimal_part = clean.split(".")[1]
-        if len(decimal_part) > 2:
-            return False
-    
+    if "." in clean and len(clean.split(".")[1]) > 2:
+        return False
     try:
         val = float(clean)
-        
-        # Si es mayor a 31, no puede ser día del mes
-        if val > 31:
-            return False
-            
-        # Si es menor a 1, no es una fecha típica
-        if val < 1:
-            return False
-            
-        # Patrones específicos que indican que NO es una fecha:
-        context_lower = context.lower()
-        if any(keyword in context_lower for keyword in [
-            "interest payment", "interest credit", "fee", "charge", 
-            "payment", "credit", "debit", "service"
-        ]):
-            return False
-            
-        # Si el valor está entre 1-31 Y el contexto parece contener una fecha completa
-        if 1 <= val <= 31:
-            # Buscar patrones de fecha en el contexto
-            if re.search(r"\b\d{1,2}\.\d{1,2}\.\d{2,4}\b", context):
-                return True
-            if re.search(r"\b(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\s+\d{1,2}\b", context, re.I):
-                return True
-                
-    except:
-        pass
-        
-    return False
+    except ValueError:
+        return False
+    return 1 <= val <= 31
 
 def _first_amount_and_cut(text: str) -> Dict[str, Any] | None:
     """
@@ -98,11 +126,12 @@ def _first_amount_and_cut(text: str) -> Dict[str, Any] | None:
     selected_match = None
     selected_index = 0
     
+    # El contexto es el mismo para todos los montos: se evalúa una sola vez
+    date_context = _date_like_context(text)
     for i, match in enumerate(matches):
-        amount_str = match.group()
-        
-        # Verificar si parece una fecha
-        if _looks_like_date_fragment(amount_str, text):
+        # Verificar si parece una fecha: "11.8" en "11.8.24" es una fecha,
+        # pero "1.97" en "Interest Payment" es un monto real
+        if date_context and _is_day_value(match.group()):
             continue
             
         # Este monto parece legítimo
@@ -124,15 +153,9 @@ def _first_amount_and_cut(text: str) -> Dict[str, Any] | None:
         desc = text
 
     # Parsear el monto seleccionado
-    raw = selected_match.group()
-    neg = raw.startswith("-") or raw.endswith("-") or raw.startswith("(")
-    clean = raw.replace("$", "").replace(",", "").replace("(", "").replace(")", "").replace("-", "")
-    try:
-        val = float(clean)
-    except:
+    val = parse_amount(selected_match.group())
+    if val is None:
         return None
-    if neg:
-        val = -val
 
     return {"amount": val, "desc": desc}
 
@@ -141,37 +164,12 @@ def _is_valid_transaction_line(line: str) -> bool:
     Verifica si una línea puede ser parte de una transacción válida.
     Filtra headers, metadatos, y otros elementos que no son transacciones.
     """
-    line_lower = line.lower()
-    
-    # Headers típicos de Wells Fargo
-    if any(header in line_lower for header in [
-        "wells fargo", "questions?", "available by phone", "online:", "write:",
-        "your business and wells fargo", "account options", "business online banking",
-        "overdraft protection", "important account information", "new york city customers",
-        "updated limits", "effective october", "this notice", "watch for debit card scams"
-    ]):
-        return False
-    
-    # Líneas de summary/totals (pero NO monthly service fee que es una transacción real)
-    if any(summary in line_lower for summary in [
-        "statement period activity", "beginning balance", "ending balance", 
-        "deposits/credits", "withdrawals/debits", "totals", 
-        "account transaction fees", "service charge description",
-        "units used", "units included", "excess units", "total service",
-        "fee period", "how to avoid", "minimum required", "average ledger",
-        "minimum daily balance", "standard monthly service fee"
-    ]):
-        return False
-    
-    # Líneas que son solo metadatos (página, números de cuenta, etc.)
-    if re.search(r"page \d+ of \d+|account number:|for direct deposit|for wire transfers|routing number", line_lower):
-        return False
-        
     # Líneas muy cortas que probablemente no son transacciones
-    if len(line.strip()) < 10:
+    if len(line) < 10:
         return False
-        
-    return True
+
+    # Headers, summary/totals y metadatos (página, números de cuenta, etc.)
+    return RE_NOT_TX_LINE.search(line) is None
 
 def _determine_direction(description: str) -> str:
     """
@@ -187,22 +185,17 @@ def _determine_direction(description: str) -> str:
         return "out"
     
     # 2) Transfers y depósitos específicos
-    if any(pattern in low for pattern in [
-        "online transfer from",  # "Online Transfer From Baxsan, LLC..."
-        "transfer from",         # General transfers coming in
-        "llc sender",           # "Baxsan, LLC Sender..." 
-        "sender"                # General sender patterns
-    ]):
+    if any(pattern in low for pattern in KW_TRANSFER_IN):
         return "in"
     
     # 3) Patrones "From" - dinero que viene DE una entidad (entrada)
-    if re.search(r"\bfrom\s+\w+", low):
+    if RE_FROM_ENTITY.search(low):
         # "Wise US Inc Acrux Glob 241106 Acrux Glob From Acrux Global Logistics LLC Via Wise"
         # "From Acrux Global" indica que el dinero viene de Acrux Global → entrada
         return "in"
     
     # 4) Pagos recibidos - Company Payment patterns
-    if re.search(r"\w+\s+company\s+payment", low) or re.search(r"\bpayment\s+\w+\s+\d+", low):
+    if RE_COMPANY_PAYMENT.search(low):
         # "Lafeber Company Payment Nov 24" → pago recibido de la empresa
         return "in"
     
@@ -213,14 +206,11 @@ def _determine_direction(description: str) -> str:
         return "out"
     
     # 6) Wire transfers que no tienen /Org= o /Bnf= 
-    if re.search(r"\bwt\s+\w+", low) and "morgan stanley" in low:
+    if RE_WT.search(low) and "morgan stanley" in low:
         return "in"
     
     # 7) Otros patrones de entrada muy específicos
-    if any(pattern in low for pattern in [
-        "interest payment", "interest credit", "deposit", 
-        "credit" # pero no "credit card"
-    ]) and "credit card" not in low:
+    if any(pattern in low for pattern in KW_CREDIT_IN) and "credit card" not in low:
         return "in"
     
     # 8) Todo lo demás es salida (incluye purchases, payments, fees, dues, monthly service fee, etc.)
@@ -228,57 +218,41 @@ def _determine_direction(description: str) -> str:
 
 class WFParser(BaseBankParser):
     key = "wf"
+    __slots__ = ()
 
-    def parse(self, pdf_bytes: bytes, full_text: str) -> List[Dict[str, Any]]:
-        lines = extract_lines(pdf_bytes)
+    def parse(self, pdf: BinaryIO, full_text: str) -> List[Dict[str, Any]]:
+        lines = split_lines(full_text)
         year = detect_year(full_text)
         results: List[Dict[str, Any]] = []
         
         # Process lines in groups (similar to GenericParser)
         i, n = 0, len(lines)
+
+        # Cada línea se clasifica una sola vez: el bucle interno y el externo
+        # vuelven a pasar por las mismas líneas, así que no repetimos los regex
+        ok = [_is_valid_transaction_line(ln) and not RE_NO_TX.search(ln) for ln in lines]
+        dates = [parse_any_date(ln, year) if good else None for ln, good in zip(lines, ok)]
         
         while i < n:
-            line = lines[i]
-            
-            # Skip empty lines and invalid transaction lines
-            if not line.strip() or not _is_valid_transaction_line(line):
-                i += 1
-                continue
-            
-            # Skip noise/headers
-            if RE_NO_TX.search(line):
+            # Skip empty lines, invalid transaction lines and noise/headers
+            if not ok[i]:
                 i += 1
                 continue
             
             # Look for date at the beginning of line
-            date = parse_mmdd_token(line, year) or parse_long_date(line) or parse_mmmdd(line, year)
+            date = dates[i]
             if not date:
                 i += 1
                 continue
             
             # Group consecutive lines that belong to the same transaction
-            block = [line]
             j = i + 1
             
-            # Continue adding lines until we find another date or reach end
-            while j < n:
-                next_line = lines[j]
-                if not next_line.strip():
-                    j += 1
-                    continue
-                    
-                # Stop if we find another date (start of new transaction)
-                if (parse_mmdd_token(next_line, year) or 
-                    parse_long_date(next_line) or 
-                    parse_mmmdd(next_line, year)):
-                    break
-                    
-                # Stop if we find noise/headers or invalid lines
-                if RE_NO_TX.search(next_line) or not _is_valid_transaction_line(next_line):
-                    break
-                    
-                block.append(next_line)
+            # Continue adding lines until we find another date (start of new
+            # transaction), noise/headers or invalid lines, or reach end
+            while j < n and ok[j] and not dates[j]:
                 j += 1
+            block = lines[i:j]
             
             # Join all lines of this transaction
             full_transaction_text = " ".join(block)